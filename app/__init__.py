@@ -1,14 +1,82 @@
-from flask import Flask
+from flask import Flask, Response, g, request
+from werkzeug.serving import is_running_from_reloader
 from config.config import Config
-import os
+from database.db_manager import release_connections, close_all_connections
+from app.services import ServiceContainer
+from app.http_cache import register_http_cache
+import atexit
+import time
 
-def create_app():
-    """Factory function para criar a aplicação Flask"""
+def create_app(start_collector=None):
+    """Factory function para criar a aplicação Flask
+    
+    start_collector decide se o coletor em segundo plano sobe neste processo;
+    None deixa o padrão (todos, exceto o pai do reloader com FLASK_DEBUG).
+    """
+    started = time.perf_counter()
     app = Flask(__name__)
     app.config.from_object(Config)
     
+    # Banco, modelo, agregador e coletor são criados no primeiro uso
+    services = ServiceContainer(Config)
+    app.extensions['services'] = services
+    
     # Registrar blueprints
     from app.controllers.trends_controller import trends_bp
     app.register_blueprint(trends_bp)
     
-    return app
\ No newline at end of file
+    # ETags, páginas renderizadas por versão dos dados e compressão
+    register_http_cache(app)
+    
+    if app.config['METRICS_ENABLED']:
+        register_metrics(app, services)
+    
+    # Coletor em segundo plano (com o reloader, só no processo filho)
+    if start_collector is None:
+        start_collector = not app.debug or is_running_from_reloader()
+    if app.config['COLLECTOR_ENABLED'] and start_collector:
+        services.start_collector()
+    
+    # Devolver as conexões do banco ao pool ao fim de cada requisição
+    app.teardown_appcontext(release_connections)
+    atexit.register(close_all_connections)
+    
+    app.config['STARTUP_SECONDS'] = time.perf_counter() - started
+    return app
+
+def register_metrics(app, services):
+    """Mede a latência de cada rota e expõe as métricas em /metrics"""
+    from app.models import metrics
+    
+    # Sem criar o agregador só para ler os contadores
+    metrics.registry.register_collector(
+        'providers', metrics.provider_stats_collector(lambda: services.peek('aggregator'))
+    )
+    metrics.registry.register_collector('page_cache', lambda: [
+        ('trends_page_cache_hits_total', 'counter', 'Acertos do cache de páginas renderizadas', {},
+         app.extensions['page_cache'].hits),
+        ('trends_page_cache_misses_total', 'counter', 'Falhas do cache de páginas renderizadas', {},
+         app.extensions['page_cache'].misses),
+    ])
+    metrics.registry.register_collector('startup', lambda: [
+        ('trends_startup_seconds', 'gauge', 'Tempo de criação da aplicação', {}, app.config.get('STARTUP_SECONDS', 0))
+    ])
+    
+    @app.before_request
+    def start_timer():
+        g.request_started = time.perf_counter()
+    
+    @app.after_request
+    def record_request(response):
+        started = g.pop('request_started', None)
+        if started is not None:
+            metrics.http_request_duration.observe(
+                time.perf_counter() - started,
+                request.endpoint or 'desconhecido', request.method, response.status_code
+            )
+        return response
+    
+    @app.route('/metrics')
+    def metrics_endpoint():
+        """Métricas no formato do Prometheus"""
+        return Response(metrics.registry.render(), mimetype='text/plain; version=0.0.4')
@@ -1,13 +1,18 @@
-from flask import Blueprint, render_template, request, jsonify, flash
-from app.models.trend_model import TrendModel
-from app.models.trends_service import TrendsAggregator
+import json
+import time
+from flask import Blueprint, Response, current_app, render_template, request, jsonify, flash, stream_with_context, url_for
+from werkzeug.local import LocalProxy
+from config.config import Config
+from app.http_cache import cached_page
+from app.models.export import FORMATS as EXPORT_FORMATS
 
 # Criar blueprint
 trends_bp = Blueprint('trends', __name__)
 
-# Inicializar serviços
-trend_model = TrendModel()
-trends_aggregator = TrendsAggregator()
+# Serviços da aplicação atual, criados só no primeiro uso (ver app/services.py)
+trend_model = LocalProxy(lambda: current_app.extensions['services'].trend_model)
+trends_aggregator = LocalProxy(lambda: current_app.extensions['services'].aggregator)
+collection_scheduler = LocalProxy(lambda: current_app.extensions['services'].scheduler)
 
 @trends_bp.route('/')
 def index():
@@ -23,17 +28,18 @@ def search_trends():
         if search_term:
             # Buscar termo específico
             trend_model.save_user_search(search_term)
-            results = trends_aggregator.search_specific_term(search_term)
             
-            # Salvar resultados no banco
-            for result in results:
-                for region, volume in result['regions'].items():
-                    trend_model.save_trend(
-                        result['term'], 
-                        result['platform'], 
-                        volume, 
-                        region
-                    )
+            # Termo coletado recentemente em todos os provedores: responder direto do banco
+            matrix = trend_model.get_regional_matrix(search_term, platforms=trends_aggregator.registry.names())
+            if matrix is not None:
+                results = matrix['results']
+                for result in results:
+                    result['source'] = 'stored'
+            else:
+                results = trends_aggregator.search_specific_term(search_term)
+                
+                # Salvar resultados no banco
+                trend_model.save_collected_trends(results)
             
             # Converter regions para lista para evitar problemas de template
             for result in results:
@@ -44,18 +50,14 @@ def search_trends():
                                  results=results, 
                                  search_term=search_term)
         else:
-            # Buscar tendências gerais dos últimos 3 dias
-            hot_trends = trends_aggregator.get_all_trends()
-            
-            # Salvar no banco
-            for trend in hot_trends[:50]:  # Limitar a 50 primeiros
-                for region, volume in trend['regions'].items():
-                    trend_model.save_trend(
-                        trend['term'], 
-                        trend['platform'], 
-                        volume, 
-                        region
-                    )
+            # Ler a última coleta feita pelo coletor em segundo plano
+            hot_trends = trend_model.get_latest_snapshot()
+            if not hot_trends:
+                job_id = collection_scheduler.enqueue()
+                # Com o coletor desligado a coleta já rodou dentro do enqueue
+                hot_trends = trend_model.get_latest_snapshot()
+                if not hot_trends:
+                    flash(f'Nenhuma coleta disponível ainda. Coleta agendada (job {job_id}).', 'info')
             
             # Converter regions para lista para evitar problemas de template
             for trend in hot_trends:
@@ -67,74 +69,197 @@ def search_trends():
     return render_template('search.html')
 
 @trends_bp.route('/ranking')
+@cached_page()
 def ranking():
     """Exibir ranking de tendências"""
-    all_trends = trend_model.get_all_trends(limit=100)
+    platform = request.args.get('platform') or None
+    
+    if platform:
+        all_trends = trend_model.get_trends_by_platform(platform, limit=100)
+    else:
+        all_trends = trend_model.get_all_trends(limit=100)
     formatted_trends = trend_model.format_trends_for_display(all_trends)
+    stats = trend_model.get_ranking_stats(platform)
     
-    return render_template('ranking.html', trends=formatted_trends)
+    return render_template('ranking.html',
+                         trends=formatted_trends,
+                         stats=stats,
+                         platforms=Config.PLATFORMS,
+                         selected_platform=platform)
+
+def _trends_format():
+    """Formato de /api/trends: ndjson (parâmetro format ou cabeçalho Accept) ou json"""
+    if (request.args.get('format') == 'ndjson'
+            or request.accept_mimetypes.best == 'application/x-ndjson'):
+        return 'ndjson'
+    return 'json'
 
 @trends_bp.route('/api/trends')
+@cached_page(variant=_trends_format)
 def api_trends():
-    """API para buscar tendências"""
+    """API para buscar tendências
+    
+    Paginação por cursor: o cabeçalho X-Next-Cursor (e Link) indica a
+    próxima página. Com format=ndjson as linhas são enviadas em streaming.
+    """
     platform = request.args.get('platform')
-    limit = int(request.args.get('limit', 50))
+    cursor = request.args.get('cursor')
+    stream = _trends_format() == 'ndjson'
+    
+    max_limit = Config.API_MAX_STREAM_LIMIT if stream else Config.API_MAX_LIMIT
+    limit = request.args.get('limit', 50, type=int)
+    limit = max(1, min(limit, max_limit))
+    
+    try:
+        after = trend_model.decode_cursor(cursor) if cursor else None
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    if stream:
+        def generate():
+            for trend in trend_model.iter_trends(platform, after, limit):
+                item = trend_model.format_trend(trend)
+                item['cursor'] = trend_model.encode_cursor(trend)
+                yield json.dumps(item, ensure_ascii=False) + '\n'
+        
+        return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
     
     if platform:
-        trends = trend_model.get_trends_by_platform(platform, limit)
+        trends = trend_model.get_trends_by_platform(platform, limit, after)
     else:
-        trends = trend_model.get_all_trends(limit)
+        trends = trend_model.get_all_trends(limit, after)
     
     formatted_trends = trend_model.format_trends_for_display(trends)
-    return jsonify(formatted_trends)
+    response = jsonify(formatted_trends)
+    
+    if len(trends) == limit:
+        next_cursor = trend_model.encode_cursor(trends[-1])
+        args = dict(request.args, cursor=next_cursor)
+        response.headers['X-Next-Cursor'] = next_cursor
+        response.headers['Link'] = f'<{url_for("trends.api_trends", **args)}>; rel="next"'
+    return response
+
+@trends_bp.route('/api/export')
+def api_export():
+    """Exporta trends ou user_searches em streaming (CSV, NDJSON ou Parquet)
+    
+    Filtros: start e end (AAAA-MM-DD, inclusivos), platform e region.
+    """
+    table = request.args.get('table', 'trends')
+    fmt = request.args.get('format', 'csv')
+    try:
+        stream = trend_model.export(
+            table, fmt,
+            start=request.args.get('start'),
+            end=request.args.get('end'),
+            platform=request.args.get('platform'),
+            region=request.args.get('region')
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    filename = f"{table}_{time.strftime('%Y%m%d')}.{fmt}"
+    return Response(stream_with_context(stream), mimetype=EXPORT_FORMATS[fmt],
+                    headers={'Content-Disposition': f'attachment; filename="{filename}"'})
 
 @trends_bp.route('/api/search/<term>')
-def api_search(term):
-    """API para buscar termo específico"""
-    results = trends_aggregator.search_specific_term(term)
+async def api_search(term):
+    """API para buscar termo específico (provedores consultados em paralelo)"""
+    results = await trends_aggregator.search_specific_term_async(term)
+    return jsonify(results)
+
+@trends_bp.route('/api/search')
+async def api_search_many():
+    """API para buscar vários termos em paralelo (?term=a&term=b)"""
+    terms = list(dict.fromkeys(term.strip() for term in request.args.getlist('term') if term.strip()))
+    if not terms:
+        return jsonify({'error': 'Informe ao menos um termo (?term=...)'}), 400
+    if len(terms) > Config.API_MAX_TERMS:
+        return jsonify({'error': f'Máximo de {Config.API_MAX_TERMS} termos por requisição'}), 400
+    
+    results = await trends_aggregator.search_terms_async(terms)
     return jsonify(results)
 
+@trends_bp.route('/api/suggest')
+def api_suggest():
+    """API de autocompletar com termos já coletados ou pesquisados (?q=)"""
+    prefix = request.args.get('q', '').strip()
+    if len(prefix) < Config.SUGGEST_MIN_CHARS:
+        return jsonify([])
+    limit = min(max(request.args.get('limit', Config.SUGGEST_LIMIT, type=int), 1), Config.API_MAX_LIMIT)
+    return jsonify(trend_model.suggest_terms(prefix, limit))
+
+@trends_bp.route('/api/providers')
+def api_providers():
+    """API com contadores dos provedores (ao vivo, fallback, disjuntor) e do cache"""
+    return jsonify(trends_aggregator.get_provider_stats())
+
+@trends_bp.route('/api/history/<term>')
+def api_history(term):
+    """API com o histórico de volume de um termo (start/end em timestamp Unix)"""
+    platform = request.args.get('platform', 'Google')
+    resolution = request.args.get('resolution') or None
+    if resolution not in (None, 'hour', 'day', 'week'):
+        return jsonify({'error': f'Resolução inválida: {resolution}'}), 400
+    start = request.args.get('start', type=float)
+    end = request.args.get('end', type=float)
+    if start is None:
+        days = request.args.get('days', Config.DEFAULT_SEARCH_DAYS, type=int)
+        start = (end or time.time()) - days * 86400
+    
+    history = trend_model.get_history(term, platform, start, end, resolution)
+    return jsonify({
+        'term': term,
+        'platform': platform,
+        'resolution': resolution,
+        'points': [{'timestamp': int(timestamp), 'volume': volume} for timestamp, volume in history]
+    })
+
 @trends_bp.route('/regional/<term>')
+@cached_page(max_age=Config.REGIONAL_MAX_AGE_SECONDS)
 def regional_analysis(term):
     """Análise regional detalhada de um termo"""
-    results = trends_aggregator.search_specific_term(term)
+    # Matriz estado × plataforma já materializada no banco, com todos os provedores
+    matrix = trend_model.get_regional_matrix(term, platforms=trends_aggregator.registry.names())
     
-    # Converter regions para lista para template
-    for result in results:
-        if isinstance(result['regions'], dict):
-            result['regions'] = list(result['regions'].items())
+    if matrix is None:
+        # Sem dados recentes (ou incompletos): buscar nos provedores e materializar
+        results = trends_aggregator.search_specific_term(term)
+        trend_model.save_collected_trends(results)
+        # Provedores que falharam agora ficam de fora (resultado parcial)
+        matrix = trend_model.get_regional_matrix(term)
     
-    # Organizar dados por estado
-    regional_data = {}
-    for result in results:
-        for region, volume in result['regions']:
-            if region not in regional_data:
-                regional_data[region] = {}
-            regional_data[region][result['platform']] = volume
+    if matrix is None:
+        # Nenhum provedor retornou dados para o termo
+        return render_template('regional_analysis.html', term=term, results=[], regional_data={}), 404
     
     return render_template('regional_analysis.html', 
                          term=term, 
-                         results=results,
-                         regional_data=regional_data)
+                         results=matrix['results'],
+                         regional_data=matrix['regional_data'])
 
 @trends_bp.route('/refresh')
 def refresh_trends():
-    """Atualizar tendências"""
-    try:
-        hot_trends = trends_aggregator.get_all_trends()
-        
-        # Salvar no banco
-        for trend in hot_trends:
-            for region, volume in trend['regions'].items():
-                trend_model.save_trend(
-                    trend['term'], 
-                    trend['platform'], 
-                    volume, 
-                    region
-                )
-        
-        flash(f'Tendências atualizadas! {len(hot_trends)} termos coletados.', 'success')
-    except Exception as e:
-        flash(f'Erro ao atualizar tendências: {str(e)}', 'error')
+    """Agendar atualização de tendências"""
+    job_id = collection_scheduler.enqueue()
+    job = collection_scheduler.get_job(job_id)
     
-    return render_template('index.html')
\ No newline at end of file
+    if request.accept_mimetypes.best == 'application/json':
+        # 202 se o job ficou na fila; 200 se rodou na hora (coletor desligado)
+        return jsonify(job), 202 if job['status'] in ('queued', 'running') else 200
+    
+    if job['status'] in ('queued', 'running'):
+        flash(f'Atualização agendada! Acompanhe o job {job_id}.', 'success')
+    elif job['status'] == 'done':
+        flash(f"Atualização concluída: {job['saved']} tendências salvas.", 'success')
+    else:
+        flash(f"Atualização não concluída: {job['error']}", 'error')
+    return render_template('index.html', job_id=job_id)
+
+@trends_bp.route('/api/jobs/<job_id>')
+def api_job_status(job_id):
+    """API para acompanhar um job de coleta"""
+    job = collection_scheduler.get_job(job_id)
+    if job is None:
+        return jsonify({'error': 'Job não encontrado'}), 404
+    return jsonify(job)
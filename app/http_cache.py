@@ -0,0 +1,206 @@
+"""Cache HTTP das páginas e APIs de tendências
+
+Respostas condicionais (ETag/Last-Modified derivados da versão dos dados),
+páginas já renderizadas por versão e compressão gzip/brotli das respostas.
+"""
+
+import functools
+import gzip
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from flask import Response, current_app, request, session
+from werkzeug.http import is_resource_modified
+from config.config import Config
+
+try:
+    import brotli
+except ImportError:
+    # brotli é opcional: sem ele as respostas usam só gzip
+    brotli = None
+
+COMPRESSIBLE_MIMETYPES = {
+    'text/html', 'text/plain', 'text/css', 'text/csv',
+    'application/json', 'application/javascript', 'application/x-ndjson'
+}
+
+
+class PageCache:
+    """Respostas renderizadas por rota e argumentos, válidas para uma versão dos dados"""
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._version = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, version):
+        with self._lock:
+            if version != self._version:
+                # Houve gravação: tudo o que foi renderizado antes está velho
+                self._entries.clear()
+                self._version = version
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def set(self, key, version, entry):
+        with self._lock:
+            if version != self._version:
+                return
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / total, 4) if total else 0.0,
+                'entries': len(self._entries)
+            }
+
+
+def choose_encoding():
+    """Melhor codificação aceita pelo cliente (br, gzip) ou None"""
+    accepted = request.accept_encodings
+    if brotli is not None and accepted['br']:
+        return 'br'
+    if accepted['gzip']:
+        return 'gzip'
+    return None
+
+
+def compress(data, encoding):
+    if encoding == 'br':
+        return brotli.compress(data, quality=Config.COMPRESSION_BROTLI_QUALITY)
+    return gzip.compress(data, compresslevel=Config.COMPRESSION_GZIP_LEVEL, mtime=0)
+
+
+def _compressible(response):
+    return (
+        200 <= response.status_code < 300
+        and not response.direct_passthrough
+        and not response.is_streamed
+        and 'Content-Encoding' not in response.headers
+        and response.mimetype in COMPRESSIBLE_MIMETYPES
+    )
+
+
+def compress_response(response):
+    """after_request: comprime corpos de texto acima de COMPRESSION_MIN_SIZE"""
+    if not _compressible(response):
+        return response
+    response.vary.add('Accept-Encoding')
+    data = response.get_data()
+    encoding = choose_encoding()
+    if encoding is None or len(data) < Config.COMPRESSION_MIN_SIZE:
+        return response
+    response.set_data(compress(data, encoding))
+    response.headers['Content-Encoding'] = encoding
+    _weaken_etag(response)
+    return response
+
+
+def _weaken_etag(response):
+    # O corpo muda com a codificação, então o ETag só pode ser fraco
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+
+
+def _from_entry(entry):
+    """Monta a resposta a partir de uma página em cache, reaproveitando o corpo já comprimido"""
+    response = Response(entry['body'], status=entry['status'], headers=entry['headers'])
+    if Config.COMPRESSION_ENABLED and _compressible(response):
+        response.vary.add('Accept-Encoding')
+        encoding = choose_encoding()
+        if encoding and len(entry['body']) >= Config.COMPRESSION_MIN_SIZE:
+            encoded = entry['encoded'].get(encoding)
+            if encoded is None:
+                encoded = entry['encoded'][encoding] = compress(entry['body'], encoding)
+            response.set_data(encoded)
+            response.headers['Content-Encoding'] = encoding
+    return response
+
+
+def cached_page(max_age=None, variant=None):
+    """Decorador de views que dependem só dos dados de tendências
+
+    O ETag vem da versão dos dados (incrementada a cada gravação) e dos
+    argumentos da requisição: se o cliente já tem essa versão recebe 304 sem
+    consulta ao banco; senão recebe o corpo renderizado uma única vez por
+    versão. Com max_age a página também expira a cada max_age segundos
+    (para views que buscam nos provedores quando os dados envelhecem).
+    variant retorna o formato negociado pelo cabeçalho Accept: ele entra na
+    chave e no ETag, e a resposta leva Vary: Accept.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            # Mensagens flash pendentes são do usuário: a página não é compartilhável
+            # (a sessão só é lida se houver cookie, para não acrescentar Vary: Cookie)
+            has_session = current_app.config['SESSION_COOKIE_NAME'] in request.cookies
+            if not Config.HTTP_CACHE_ENABLED or (has_session and session.get('_flashes')):
+                return view(*args, **kwargs)
+
+            version, updated_at = current_app.extensions['services'].trend_model.get_data_version()
+            key = (request.path, tuple(sorted(request.args.items(multi=True))))
+            if variant:
+                key += (variant(),)
+            if max_age:
+                key += (int(time.time() // max_age),)
+            etag = hashlib.sha1(repr((version, key)).encode('utf-8')).hexdigest()[:20]
+            last_modified = None
+            # Last-Modified não distingue formatos negociados nem páginas que expiram
+            if updated_at and not max_age and not variant:
+                last_modified = datetime.fromtimestamp(int(updated_at), timezone.utc)
+
+            if not is_resource_modified(request.environ, etag=etag, last_modified=last_modified):
+                response = Response(status=304)
+            else:
+                page_cache = current_app.extensions['page_cache']
+                entry = page_cache.get(key, version)
+                if entry is None:
+                    response = current_app.make_response(view(*args, **kwargs))
+                    if response.status_code != 200 or response.is_streamed:
+                        if variant:
+                            response.vary.add('Accept')
+                        return response
+                    entry = {
+                        'body': response.get_data(),
+                        'status': response.status_code,
+                        'headers': [(name, value) for name, value in response.headers if name != 'Content-Length'],
+                        'encoded': {}
+                    }
+                    page_cache.set(key, version, entry)
+                response = _from_entry(entry)
+
+            response.set_etag(etag, weak=True)
+            if variant:
+                response.vary.add('Accept')
+            if last_modified:
+                response.last_modified = last_modified
+            # O cliente sempre revalida; a revalidação custa uma leitura da versão
+            response.cache_control.no_cache = True
+            return response
+        return wrapper
+    return decorator
+
+
+def register_http_cache(app):
+    """Cria o cache de páginas e comprime as respostas (COMPRESSION_ENABLED)"""
+    app.extensions['page_cache'] = PageCache(app.config['PAGE_CACHE_MAX_ENTRIES'])
+    if app.config['COMPRESSION_ENABLED']:
+        app.after_request(compress_response)
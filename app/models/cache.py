@@ -0,0 +1,234 @@
+import copy
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from config.config import Config
+
+
+class MemoryCacheBackend:
+    """Cache em memória com expiração (TTL) e descarte LRU"""
+
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Retorna o valor armazenado ou None se ausente/expirado"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        """Armazena um valor por ttl segundos"""
+        with self._lock:
+            self._entries[key] = (value, time.time() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        """Remove um valor do cache"""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        """Esvazia o cache"""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SQLiteCacheBackend:
+    """Cache persistente em SQLite, sobrevive a reinicializações"""
+
+    def __init__(self, db_path="database/cache.db", max_entries=10000):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        os.makedirs(os.path.dirname(self.db_path) or '.', exist_ok=True)
+
+        with self._connect() as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS cache_entries (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    expires_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                )
+            ''')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_cache_accessed ON cache_entries (accessed_at)')
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=10)
+
+    @staticmethod
+    def _encode_key(key):
+        return json.dumps(list(key) if isinstance(key, tuple) else key, ensure_ascii=False)
+
+    def get(self, key):
+        """Retorna o valor armazenado ou None se ausente/expirado"""
+        now = time.time()
+        encoded = self._encode_key(key)
+        conn = self._connect()
+        try:
+            with conn:
+                row = conn.execute(
+                    'SELECT value, expires_at FROM cache_entries WHERE key = ?', (encoded,)
+                ).fetchone()
+                if row is None:
+                    return None
+                if row[1] <= now:
+                    conn.execute('DELETE FROM cache_entries WHERE key = ?', (encoded,))
+                    return None
+                conn.execute('UPDATE cache_entries SET accessed_at = ? WHERE key = ?', (now, encoded))
+            return json.loads(row[0])
+        finally:
+            conn.close()
+
+    def set(self, key, value, ttl):
+        """Armazena um valor por ttl segundos"""
+        now = time.time()
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute('''
+                    INSERT OR REPLACE INTO cache_entries (key, value, expires_at, accessed_at)
+                    VALUES (?, ?, ?, ?)
+                ''', (self._encode_key(key), json.dumps(value, ensure_ascii=False), now + ttl, now))
+                # Descartar as entradas usadas há mais tempo além do limite
+                conn.execute('''
+                    DELETE FROM cache_entries WHERE key IN (
+                        SELECT key FROM cache_entries
+                        ORDER BY accessed_at DESC LIMIT -1 OFFSET ?
+                    )
+                ''', (self.max_entries,))
+        finally:
+            conn.close()
+
+    def delete(self, key):
+        """Remove um valor do cache"""
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute('DELETE FROM cache_entries WHERE key = ?', (self._encode_key(key),))
+        finally:
+            conn.close()
+
+    def clear(self):
+        """Esvazia o cache"""
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute('DELETE FROM cache_entries')
+        finally:
+            conn.close()
+
+    def __len__(self):
+        conn = self._connect()
+        try:
+            return conn.execute('SELECT COUNT(*) FROM cache_entries').fetchone()[0]
+        finally:
+            conn.close()
+
+
+class ResultCache:
+    """Cache de resultados com deduplicação de buscas concorrentes
+
+    As chaves seguem o formato (termo, plataforma, região, período).
+    """
+
+    def __init__(self, backend=None, ttl=900):
+        self.backend = backend if backend is not None else MemoryCacheBackend()
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(term, platform, region='BR', timeframe='now 7-d'):
+        """Monta a chave normalizada de um resultado"""
+        return (term.strip().lower(), platform, region, timeframe)
+
+    def get(self, key):
+        """Busca um valor no cache contabilizando acertos e falhas"""
+        value = self.backend.get(key)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return copy.deepcopy(value)
+
+    def set(self, key, value):
+        """Armazena um valor no cache"""
+        self.backend.set(key, copy.deepcopy(value), self.ttl)
+
+    def get_or_compute(self, key, compute, should_cache=None):
+        """Retorna o valor em cache ou calcula uma única vez por chave
+
+        Buscas concorrentes pela mesma chave aguardam o cálculo em andamento
+        em vez de repetir a chamada ao provedor. should_cache(valor) permite
+        não guardar resultados degradados.
+        """
+        value = self.get(key)
+        if value is not None:
+            return value
+
+        with self._lock:
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = {'event': threading.Event(), 'value': None, 'error': None}
+                self._inflight[key] = flight
+
+        if not leader:
+            flight['event'].wait()
+            if flight['error'] is not None:
+                raise flight['error']
+            return copy.deepcopy(flight['value'])
+
+        try:
+            value = compute()
+            if value is not None and (should_cache is None or should_cache(value)):
+                self.set(key, value)
+            flight['value'] = value
+            return copy.deepcopy(value)
+        except Exception as e:
+            flight['error'] = e
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            flight['event'].set()
+
+    def stats(self):
+        """Retorna contadores de acertos e falhas"""
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': self.hits / total if total else 0.0,
+            'entries': len(self.backend)
+        }
+
+
+def create_cache(config=Config):
+    """Cria o cache de resultados conforme a configuração"""
+    if config.CACHE_BACKEND == 'sqlite':
+        backend = SQLiteCacheBackend(config.CACHE_DB_PATH, config.CACHE_MAX_ENTRIES)
+    else:
+        backend = MemoryCacheBackend(config.CACHE_MAX_ENTRIES)
+    return ResultCache(backend, ttl=config.CACHE_TTL_SECONDS)
@@ -0,0 +1,89 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+
+class CollectionTask:
+    """Unidade de trabalho executada pelo motor de coleta"""
+
+    def __init__(self, provider, func, *args, **kwargs):
+        self.provider = provider
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+
+
+class CollectionEngine:
+    """Executa chamadas aos provedores em paralelo com limites e prazo"""
+
+    def __init__(self, max_workers=8, deadline=30.0, provider_limits=None, default_limit=4, rate_limiters=None):
+        self.max_workers = max_workers
+        self.deadline = deadline
+        self.provider_limits = provider_limits or {}
+        self.default_limit = default_limit
+        self._semaphores = {}
+        self._semaphores_lock = threading.Lock()
+        # {provedor: TokenBucket} do próprio provedor: tarefas só começam quando há ficha
+        self.rate_limiters = rate_limiters or {}
+
+    def _get_semaphore(self, provider):
+        """Retorna o semáforo que limita a concorrência de um provedor"""
+        with self._semaphores_lock:
+            if provider not in self._semaphores:
+                limit = self.provider_limits.get(provider, self.default_limit)
+                self._semaphores[provider] = threading.BoundedSemaphore(max(1, limit))
+            return self._semaphores[provider]
+
+    def _execute(self, task, deadline_at):
+        """Executa uma tarefa respeitando o limite do provedor e o prazo"""
+        semaphore = self._get_semaphore(task.provider)
+        remaining = deadline_at - time.monotonic()
+        if remaining <= 0 or not semaphore.acquire(timeout=remaining):
+            raise TimeoutError(f"Prazo esgotado aguardando o provedor {task.provider}")
+        rate_limiter = self.rate_limiters.get(task.provider)
+        try:
+            # A ficha fica reservada para a primeira chamada da tarefa ao provedor
+            if rate_limiter is not None and not rate_limiter.reserve(timeout=max(0, deadline_at - time.monotonic())):
+                raise TimeoutError(f"Prazo esgotado aguardando o limite de taxa do provedor {task.provider}")
+            return task.func(*task.args, **task.kwargs)
+        finally:
+            if rate_limiter is not None:
+                rate_limiter.release_reserved()
+            semaphore.release()
+
+    def run(self, tasks, deadline=None):
+        """Executa as tarefas e retorna os resultados na mesma ordem
+
+        Tarefas que falharem ou não terminarem dentro do prazo retornam None,
+        permitindo resultados parciais.
+        """
+        tasks = list(tasks)
+        if not tasks:
+            return []
+
+        deadline = self.deadline if deadline is None else deadline
+        deadline_at = time.monotonic() + deadline
+        results = [None] * len(tasks)
+
+        executor = ThreadPoolExecutor(max_workers=min(self.max_workers, len(tasks)))
+        try:
+            futures = {
+                executor.submit(self._execute, task, deadline_at): index
+                for index, task in enumerate(tasks)
+            }
+            done, not_done = wait(futures, timeout=max(0, deadline_at - time.monotonic()))
+
+            for future in done:
+                index = futures[future]
+                try:
+                    results[index] = future.result()
+                except Exception as e:
+                    print(f"Erro na coleta do provedor {tasks[index].provider}: {e}")
+
+            for future in not_done:
+                future.cancel()
+                print(f"Prazo esgotado na coleta do provedor {tasks[futures[future]].provider}")
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        return results
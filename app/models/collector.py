@@ -0,0 +1,175 @@
+import os
+import queue
+import socket
+import threading
+import uuid
+from datetime import datetime
+import schedule
+from config.config import Config
+
+
+class CollectionScheduler:
+    """Coletor em segundo plano, desacoplado das requisições HTTP
+
+    Cada provedor é coletado no seu próprio intervalo (com jitter), e as
+    execuções manuais entram na mesma fila. Um lock no banco impede que
+    dois processos coletem ao mesmo tempo.
+    """
+
+    LOCK_NAME = 'collector'
+
+    def __init__(self, aggregator, trend_model, intervals=None, jitter=None, max_jobs=100):
+        self.aggregator = aggregator
+        self.trend_model = trend_model
+        self.intervals = intervals if intervals is not None else Config.COLLECTOR_INTERVALS
+        self.jitter = Config.COLLECTOR_JITTER_SECONDS if jitter is None else jitter
+        self.max_jobs = max_jobs
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+        self.scheduler = schedule.Scheduler()
+        self._queue = queue.Queue()
+        self._jobs = {}
+        self._jobs_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        # Tarefas de manutenção periódicas: (nome, intervalo, função)
+        self._maintenance = []
+
+    def start(self):
+        """Agenda as coletas periódicas e inicia a thread de trabalho"""
+        if self.running:
+            return
+        for platform, interval in self.intervals.items():
+            self.scheduler.every(interval).to(interval + self.jitter).seconds.do(
+                self.enqueue, platforms=[platform], trigger='schedule'
+            )
+        for name, interval, func in self._maintenance:
+            self.scheduler.every(interval).seconds.do(self._run_maintenance, name, func)
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._worker, name='trends-collector', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Interrompe a thread de trabalho"""
+        self._stop.set()
+        self.scheduler.clear()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def prewarm(self):
+        """Renova antes do pedido os dados dos termos mais pesquisados
+        
+        Busca os termos populares em todos os provedores dentro do orçamento
+        PREWARM_BUDGET_SECONDS, renovando a matriz regional (e o cache dos
+        provedores consultados termo a termo) usados por /search,
+        /regional/<term> e /api/search/<term>.
+        """
+        terms = self.trend_model.get_popular_searches()
+        if not terms:
+            return 0
+        results = self.aggregator.refresh_terms(terms, deadline=Config.PREWARM_BUDGET_SECONDS)
+        return self.trend_model.save_collected_trends(results)
+    
+    def add_maintenance(self, name, interval, func):
+        """Registra uma tarefa de manutenção executada na thread do coletor"""
+        self._maintenance.append((name, interval, func))
+    
+    def _run_maintenance(self, name, func):
+        try:
+            func()
+        except Exception as e:
+            print(f"Erro na manutenção {name}: {e}")
+        finally:
+            self.trend_model.db.pool.release()
+    
+    @property
+    def running(self):
+        """Se a thread de trabalho está ativa (COLLECTOR_ENABLED)"""
+        return self._thread is not None and self._thread.is_alive()
+    
+    def enqueue(self, platforms=None, trigger='manual'):
+        """Coloca uma coleta na fila e retorna o id do job
+        
+        Sem a thread de trabalho (coletor desligado) o job roda na hora, na
+        thread de quem chamou, em vez de ficar na fila para sempre.
+        """
+        with self._jobs_lock:
+            # Coletas agendadas não se acumulam se a anterior ainda está na fila
+            for job in self._jobs.values():
+                if job['status'] == 'queued' and job['platforms'] == platforms:
+                    return job['id']
+
+            job = {
+                'id': uuid.uuid4().hex,
+                'status': 'queued',
+                'trigger': trigger,
+                'platforms': platforms,
+                'created_at': datetime.now().isoformat(timespec='seconds'),
+                'started_at': None,
+                'finished_at': None,
+                'terms': 0,
+                'saved': 0,
+                'error': None
+            }
+            self._jobs[job['id']] = job
+            self._prune_jobs()
+        if self.running:
+            self._queue.put(job['id'])
+        else:
+            self.run_job(job['id'])
+        return job['id']
+
+    def get_job(self, job_id):
+        """Retorna uma cópia do estado de um job"""
+        with self._jobs_lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def _prune_jobs(self):
+        """Descarta os jobs finalizados mais antigos"""
+        finished = [job_id for job_id, job in self._jobs.items()
+                    if job['status'] not in ('queued', 'running')]
+        for job_id in finished[:max(0, len(self._jobs) - self.max_jobs)]:
+            del self._jobs[job_id]
+
+    def _update_job(self, job_id, **fields):
+        with self._jobs_lock:
+            self._jobs[job_id].update(fields)
+
+    def _worker(self):
+        """Executa as coletas pendentes até ser interrompido"""
+        while not self._stop.is_set():
+            self.scheduler.run_pending()
+            try:
+                job_id = self._queue.get(timeout=1)
+            except queue.Empty:
+                continue
+            self.run_job(job_id)
+
+    def run_job(self, job_id):
+        """Executa um job de coleta protegido contra execuções sobrepostas"""
+        job = self.get_job(job_id)
+        if job is None:
+            return
+
+        db = self.trend_model.db
+        ttl = Config.COLLECTOR_LOCK_TTL_SECONDS
+        # Dono por execução: dois jobs do mesmo processo também não se sobrepõem
+        owner = f"{self.owner}:{job_id}"
+        if not db.acquire_lock(self.LOCK_NAME, owner, ttl):
+            self._update_job(job_id, status='skipped', error='Outra coleta já está em andamento',
+                             finished_at=datetime.now().isoformat(timespec='seconds'))
+            return
+
+        self._update_job(job_id, status='running', started_at=datetime.now().isoformat(timespec='seconds'))
+        try:
+            trends = self.aggregator.get_all_trends(platforms=job['platforms'])
+            saved = self.trend_model.save_collected_trends(trends, from_collection=True)
+            self._update_job(job_id, status='done', terms=len(trends), saved=saved)
+        except Exception as e:
+            print(f"Erro na coleta em segundo plano: {e}")
+            self._update_job(job_id, status='failed', error=str(e))
+        finally:
+            db.release_lock(self.LOCK_NAME, owner)
+            db.pool.release()
+            self._update_job(job_id, finished_at=datetime.now().isoformat(timespec='seconds'))
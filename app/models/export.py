@@ -0,0 +1,123 @@
+"""Exportação em streaming das tabelas de tendências
+
+Converte os blocos de linhas lidos do banco (Database.iter_export) em CSV,
+NDJSON ou Parquet sem montar o arquivo inteiro na memória: cada bloco vira
+um pedaço do CSV/NDJSON ou um row group do Parquet.
+"""
+
+import csv
+import io
+import json
+from datetime import date, datetime
+
+# Formato -> tipo MIME
+FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+    'parquet': 'application/vnd.apache.parquet'
+}
+
+# Tipos das colunas no Parquet (as demais são texto)
+PARQUET_TYPES = {
+    'search_volume': 'int64',
+    'date': 'date32',
+    'created_at': 'timestamp',
+    'search_date': 'timestamp'
+}
+
+
+def iter_csv(columns, batches):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for rows in batches:
+        writer.writerows(rows)
+        yield buffer.getvalue().encode('utf-8')
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode('utf-8')
+
+
+def iter_ndjson(columns, batches):
+    for rows in batches:
+        yield ''.join(
+            json.dumps(dict(zip(columns, row)), ensure_ascii=False) + '\n' for row in rows
+        ).encode('utf-8')
+
+
+class _ChunkSink(io.RawIOBase):
+    """Arquivo só de escrita que entrega o que foi escrito desde a última leitura"""
+
+    def __init__(self):
+        super().__init__()
+        self._chunks = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def _parquet_schema(columns):
+    import pyarrow as pa
+    types = {'int64': pa.int64(), 'date32': pa.date32(), 'timestamp': pa.timestamp('s')}
+    return pa.schema([(column, types.get(PARQUET_TYPES.get(column), pa.string())) for column in columns])
+
+
+def iter_parquet(columns, batches):
+    # pandas e pyarrow só são carregados quando alguém exporta em Parquet
+    import pandas as pd
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = _parquet_schema(columns)
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema, compression='snappy')
+    try:
+        for rows in batches:
+            frame = pd.DataFrame.from_records(rows, columns=columns)
+            for column in columns:
+                kind = PARQUET_TYPES.get(column)
+                # Formato explícito: sem ele o pandas interpreta data por data
+                if kind == 'date32':
+                    frame[column] = pd.to_datetime(frame[column], format='%Y-%m-%d').dt.date
+                elif kind == 'timestamp':
+                    frame[column] = pd.to_datetime(frame[column], format='%Y-%m-%d %H:%M:%S').astype('datetime64[s]')
+            writer.write_table(pa.Table.from_pandas(frame, schema=schema, preserve_index=False))
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+WRITERS = {'csv': iter_csv, 'ndjson': iter_ndjson, 'parquet': iter_parquet}
+
+
+def export_stream(columns, batches, fmt):
+    """Gera os bytes do arquivo no formato fmt (csv, ndjson ou parquet)"""
+    if fmt not in WRITERS:
+        raise ValueError(f'Formato desconhecido: {fmt}')
+    return WRITERS[fmt](columns, batches)
+
+
+def parse_day(value):
+    """Converte uma data AAAA-MM-DD no número do dia (dias desde 1970-01-01)"""
+    if not value:
+        return None
+    try:
+        return (datetime.strptime(value, '%Y-%m-%d').date() - date(1970, 1, 1)).days
+    except ValueError:
+        raise ValueError(f'Data inválida: {value} (use AAAA-MM-DD)')
@@ -0,0 +1,222 @@
+"""Métricas da aplicação no formato texto do Prometheus
+
+Contadores e histogramas simples, sem dependências externas, além de
+coletores que leem na hora os contadores do cache e dos provedores.
+"""
+
+import functools
+import threading
+import time
+from config.config import Config
+
+# Limites (segundos) dos histogramas de latência
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(
+        '{}="{}"'.format(name, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for name, value in pairs
+    ) + '}'
+
+
+class Counter:
+    """Contador monotônico com rótulos"""
+
+    type = 'counter'
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount=1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            values = dict(self._values)
+        for label_values, value in sorted(values.items()):
+            yield f"{self.name}{_format_labels(self.labels, label_values)} {value}"
+
+
+class Histogram:
+    """Histograma cumulativo com rótulos"""
+
+    type = 'histogram'
+
+    def __init__(self, name, documentation, labels=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        # rótulos -> [contagem por limite..., contagem total, soma]
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        with self._lock:
+            state = self._values.get(label_values)
+            if state is None:
+                state = self._values[label_values] = [0] * (len(self.buckets) + 1) + [0.0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[index] += 1
+            state[-2] += 1
+            state[-1] += value
+
+    def samples(self):
+        with self._lock:
+            values = {key: list(state) for key, state in self._values.items()}
+        for label_values, state in sorted(values.items()):
+            for bound, count in zip(self.buckets + ('+Inf',), state[:-1]):
+                yield f"{self.name}_bucket{_format_labels(self.labels, label_values, [('le', bound)])} {count}"
+            yield f"{self.name}_sum{_format_labels(self.labels, label_values)} {state[-1]}"
+            yield f"{self.name}_count{_format_labels(self.labels, label_values)} {state[-2]}"
+
+
+class MetricsRegistry:
+    """Conjunto de métricas e coletores expostos em /metrics"""
+
+    def __init__(self):
+        self._metrics = []
+        self._collectors = {}
+
+    def counter(self, name, documentation, labels=()):
+        metric = Counter(name, documentation, labels)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name, documentation, labels=(), buckets=DEFAULT_BUCKETS):
+        metric = Histogram(name, documentation, labels, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def register_collector(self, name, collector):
+        """Registra (ou substitui) uma função que retorna [(nome, tipo, descrição, {rótulos}, valor)]"""
+        self._collectors[name] = collector
+
+    def render(self):
+        """Gera o texto no formato de exposição do Prometheus"""
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            lines.extend(metric.samples())
+
+        described = set()
+        for collector in list(self._collectors.values()):
+            try:
+                samples = collector()
+            except Exception as e:
+                print(f"Erro ao coletar métricas: {e}")
+                continue
+            for name, metric_type, documentation, labels, value in samples:
+                if name not in described:
+                    lines.append(f"# HELP {name} {documentation}")
+                    lines.append(f"# TYPE {name} {metric_type}")
+                    described.add(name)
+                lines.append(f"{name}{_format_labels(labels.keys(), labels.values())} {value}")
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+http_request_duration = registry.histogram(
+    'trends_http_request_duration_seconds', 'Duração das requisições HTTP por rota',
+    ('endpoint', 'method', 'status')
+)
+provider_call_duration = registry.histogram(
+    'trends_provider_call_duration_seconds', 'Duração das chamadas aos provedores',
+    ('provider', 'operation')
+)
+provider_calls = registry.counter(
+    'trends_provider_calls_total', 'Chamadas aos provedores por resultado (ok ou error)',
+    ('provider', 'operation', 'outcome')
+)
+provider_results = registry.counter(
+    'trends_provider_results_total', 'Termos retornados pelos provedores por origem (live, fallback, simulated)',
+    ('provider', 'source')
+)
+db_query_duration = registry.histogram(
+    'trends_db_query_duration_seconds', 'Duração das operações no banco',
+    ('operation',)
+)
+db_rows = registry.counter(
+    'trends_db_rows_total', 'Linhas lidas ou gravadas por operação no banco',
+    ('operation',)
+)
+
+
+def observe_provider_call(provider, operation, func, *args, **kwargs):
+    """Executa uma chamada a um provedor medindo duração e falhas"""
+    started = time.perf_counter()
+    outcome = 'error'
+    try:
+        result = func(*args, **kwargs)
+        outcome = 'ok'
+        return result
+    finally:
+        elapsed = time.perf_counter() - started
+        provider_call_duration.observe(elapsed, provider, operation)
+        provider_calls.inc(provider, operation, outcome)
+        if Config.METRICS_SLOW_CALL_MS and elapsed * 1000 >= Config.METRICS_SLOW_CALL_MS:
+            print(f"Chamada lenta ao provedor {provider} ({operation}): {elapsed * 1000:.0f} ms")
+
+
+def timed_query(operation):
+    """Decorador que mede a duração e as linhas de uma operação no banco"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            result = func(*args, **kwargs)
+            elapsed = time.perf_counter() - started
+            db_query_duration.observe(elapsed, operation)
+            if isinstance(result, int) and not isinstance(result, bool):
+                db_rows.inc(operation, amount=result)
+            elif isinstance(result, (list, tuple)):
+                db_rows.inc(operation, amount=len(result))
+            if Config.METRICS_SLOW_QUERY_MS and elapsed * 1000 >= Config.METRICS_SLOW_QUERY_MS:
+                print(f"Consulta lenta ({operation}): {elapsed * 1000:.0f} ms")
+            return result
+        return wrapper
+    return decorator
+
+
+def provider_stats_collector(get_aggregator):
+    """Coletor com os contadores do cache e dos clientes dos provedores
+
+    get_aggregator retorna o agregador atual ou None se ainda não foi criado.
+    """
+    def collect():
+        samples = []
+        aggregator = get_aggregator()
+        if aggregator is None:
+            return samples
+        for name, stats in aggregator.get_provider_stats().items():
+            if name == 'cache':
+                samples += [
+                    ('trends_cache_hits_total', 'counter', 'Acertos do cache de resultados', {}, stats['hits']),
+                    ('trends_cache_misses_total', 'counter', 'Falhas do cache de resultados', {}, stats['misses']),
+                    ('trends_cache_hit_ratio', 'gauge', 'Taxa de acertos do cache de resultados', {}, stats['hit_ratio']),
+                    ('trends_cache_entries', 'gauge', 'Entradas no cache de resultados', {}, stats['entries']),
+                ]
+                continue
+            for counter, value in stats.items():
+                if counter == 'circuit':
+                    samples.append(('trends_provider_circuit_open', 'gauge',
+                                    'Disjuntor do provedor aberto (1) ou fechado (0)',
+                                    {'provider': name}, int(value != 'closed')))
+                else:
+                    samples.append(('trends_provider_client_events_total', 'counter',
+                                    'Contadores do cliente resiliente do provedor',
+                                    {'provider': name, 'event': counter}, value))
+        return samples
+    return collect
@@ -0,0 +1,143 @@
+import threading
+from config.config import Config
+from app.models.resilience import TokenBucket
+
+
+class TrendProvider:
+    """Interface de um provedor de tendências e suas capacidades
+
+    As capacidades orientam o planejamento da coleta: batch_size termos por
+    chamada de fetch, até max_concurrency chamadas simultâneas (None usa o
+    padrão do motor), no máximo rate_limit_per_minute chamadas por minuto
+    (com rajadas de até rate_burst, no balde rate_limiter) e, sem
+    supports_regions, nenhum dado regional.
+    """
+
+    name = None
+    batch_size = 1
+    max_concurrency = None
+    rate_limit_per_minute = None
+    rate_burst = 1
+    rate_limiter = None
+    supports_regions = True
+
+    def list_trending(self):
+        """Retorna os termos em alta no provedor"""
+        raise NotImplementedError
+
+    def fetch(self, terms):
+        """Retorna [(termo, volume, regiões, origem, série)] para até batch_size termos"""
+        raise NotImplementedError
+
+    def stats(self):
+        """Contadores do provedor (None se não houver)"""
+        return None
+
+
+class GoogleProvider(TrendProvider):
+    """Google Trends: termos em lote, com limite de taxa e dados reais"""
+
+    name = 'Google'
+
+    def __init__(self, service):
+        self.service = service
+        self.batch_size = Config.GOOGLE_BATCH_SIZE
+        self.max_concurrency = Config.COLLECTOR_PROVIDER_LIMITS.get(self.name)
+        self.rate_limit_per_minute = Config.GOOGLE_RATE_LIMIT_PER_MINUTE
+        self.rate_burst = Config.GOOGLE_RATE_BURST
+        # O mesmo balde do cliente: coleta, buscas e retentativas dividem as fichas
+        self.rate_limiter = service.client.rate_limiter
+
+    def list_trending(self):
+        return self.service.get_trending_searches()
+
+    def fetch(self, terms):
+        data = self.service.get_batch_data(terms)
+        return [(term, *data[term]) for term in terms]
+
+    def stats(self):
+        return self.service.client.stats()
+
+
+class SocialProvider(TrendProvider):
+    """Rede social atendida pelo SocialMediaService (volumes simulados)"""
+
+    def __init__(self, name, service, list_trending):
+        self.name = name
+        self.service = service
+        self._list_trending = list_trending
+        self.max_concurrency = Config.COLLECTOR_PROVIDER_LIMITS.get(name)
+
+    def list_trending(self):
+        return self._list_trending()
+
+    def fetch(self, terms):
+        platform = self.name.lower()
+        return [(
+            term,
+            self.service.search_term_volume(term, platform),
+            self.service.get_brazilian_regions_for_social(term, platform) if self.supports_regions else {},
+            'simulated',
+            []
+        ) for term in terms]
+
+
+class ProviderRegistry:
+    """Registro dos provedores disponíveis, instanciados só quando habilitados e usados"""
+
+    def __init__(self, enabled=None):
+        self.enabled = Config.ENABLED_PROVIDERS if enabled is None else enabled
+        self._factories = {}
+        self._providers = {}
+        self._lock = threading.Lock()
+
+    def register(self, name, factory):
+        """Registra a fábrica de um provedor (chamada sem argumentos)"""
+        self._factories[name] = factory
+
+    def names(self, platforms=None):
+        """Nomes dos provedores habilitados, na ordem de registro"""
+        return [
+            name for name in self._factories
+            if name in self.enabled and (platforms is None or name in platforms)
+        ]
+
+    def get(self, name):
+        """Retorna a instância de um provedor, criando-a no primeiro uso"""
+        with self._lock:
+            provider = self._providers.get(name)
+            if provider is None:
+                provider = self._factories[name]()
+                self._providers[name] = provider
+            return provider
+
+    def providers(self, platforms=None):
+        """Instâncias dos provedores habilitados (ou só dos informados)"""
+        return [self.get(name) for name in self.names(platforms)]
+
+    def concurrency_limits(self):
+        """Limite de chamadas simultâneas de cada provedor habilitado"""
+        return {
+            provider.name: provider.max_concurrency
+            for provider in self.providers() if provider.max_concurrency
+        }
+
+    def rate_limiters(self):
+        """Balde de fichas de cada provedor habilitado que declara limite de taxa"""
+        limiters = {}
+        for provider in self.providers():
+            if provider.rate_limiter is None and provider.rate_limit_per_minute:
+                provider.rate_limiter = TokenBucket(provider.rate_limit_per_minute / 60, max(1, provider.rate_burst))
+            if provider.rate_limiter is not None:
+                limiters[provider.name] = provider.rate_limiter
+        return limiters
+
+    def stats(self):
+        """Contadores dos provedores já instanciados"""
+        with self._lock:
+            providers = list(self._providers.values())
+        return {
+            provider.name.lower(): stats
+            for provider in providers
+            for stats in [provider.stats()] if stats is not None
+        }
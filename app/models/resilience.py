@@ -0,0 +1,201 @@
+import random
+import threading
+import time
+import requests
+from pytrends.exceptions import ResponseError, TooManyRequestsError
+
+
+class CircuitOpenError(Exception):
+    """Chamada recusada porque o circuito do provedor está aberto"""
+
+
+class TokenBucket:
+    """Limitador de taxa por balde de fichas (rate fichas por segundo)"""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+        # Fichas já reservadas por cada thread (reserve)
+        self._reserved = threading.local()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    def acquire(self, timeout=None):
+        """Aguarda uma ficha; retorna False se o tempo limite esgotar"""
+        if getattr(self._reserved, 'tokens', 0):
+            self._reserved.tokens -= 1
+            return True
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait = (1 - self._tokens) / self.rate
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                wait = min(wait, remaining)
+            time.sleep(wait)
+
+    def reserve(self, timeout=None):
+        """Aguarda uma ficha e a guarda para o próximo acquire desta thread"""
+        if not self.acquire(timeout):
+            return False
+        self._reserved.tokens = getattr(self._reserved, 'tokens', 0) + 1
+        return True
+
+    def release_reserved(self):
+        """Devolve ao balde as fichas reservadas por esta thread e não usadas"""
+        tokens = getattr(self._reserved, 'tokens', 0)
+        if tokens:
+            self._reserved.tokens = 0
+            with self._lock:
+                self._refill()
+                self._tokens = min(self.capacity, self._tokens + tokens)
+
+
+class CircuitBreaker:
+    """Abre o circuito após falhas seguidas e testa de novo após um intervalo"""
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold=5, reset_timeout=300):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0
+        # Início da chamada de teste em andamento (None se não houver)
+        self._probe_started_at = None
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """Indica se uma chamada pode ser feita agora
+
+        Meio aberto, só uma chamada de teste passa por vez; as demais são
+        recusadas até ela terminar (ou passar reset_timeout sem resposta).
+        """
+        with self._lock:
+            now = time.monotonic()
+            if self.state == self.OPEN:
+                if now - self._opened_at < self.reset_timeout:
+                    return False
+                self.state = self.HALF_OPEN
+            if self.state == self.HALF_OPEN:
+                if self._probe_started_at is not None and now - self._probe_started_at < self.reset_timeout:
+                    return False
+                self._probe_started_at = now
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._probe_started_at = None
+            self.state = self.CLOSED
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._probe_started_at = None
+            if self.state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+
+
+def is_retryable(error):
+    """Erros temporários: limite de taxa (429), erros 5xx e falhas de rede"""
+    if isinstance(error, TooManyRequestsError):
+        return True
+    if isinstance(error, ResponseError):
+        status = getattr(error.response, 'status_code', None)
+        return status == 429 or (status is not None and status >= 500)
+    return isinstance(error, (requests.exceptions.ConnectionError, requests.exceptions.Timeout))
+
+
+class ResilientClient:
+    """Executa chamadas a um provedor com limite de taxa, retentativas e disjuntor
+
+    Também conta chamadas ao vivo e respostas de fallback, para que dados
+    degradados fiquem visíveis.
+    """
+
+    def __init__(self, name, rate_limiter=None, breaker=None, max_retries=3,
+                 backoff_base=2.0, backoff_max=60.0, acquire_timeout=30.0):
+        self.name = name
+        self.rate_limiter = rate_limiter
+        self.breaker = breaker or CircuitBreaker()
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.acquire_timeout = acquire_timeout
+        self.counters = {
+            'calls': 0,
+            'live': 0,
+            'fallback': 0,
+            'retries': 0,
+            'failures': 0,
+            'rate_limited': 0,
+            'short_circuited': 0
+        }
+        self._lock = threading.Lock()
+
+    def _count(self, counter, amount=1):
+        with self._lock:
+            self.counters[counter] += amount
+
+    def _backoff(self, attempt):
+        """Espera exponencial com jitter completo"""
+        delay = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+        return random.uniform(0, delay)
+
+    def call(self, func, *args, **kwargs):
+        """Executa func respeitando o limite de taxa e o disjuntor"""
+        for attempt in range(self.max_retries + 1):
+            if not self.breaker.allow():
+                self._count('short_circuited')
+                raise CircuitOpenError(f"Circuito aberto para {self.name}")
+            if self.rate_limiter is not None and not self.rate_limiter.acquire(self.acquire_timeout):
+                raise TimeoutError(f"Limite de taxa de {self.name} sem fichas disponíveis")
+
+            self._count('calls')
+            try:
+                result = func(*args, **kwargs)
+            except Exception as e:
+                self.breaker.record_failure()
+                if isinstance(e, TooManyRequestsError):
+                    self._count('rate_limited')
+                if not is_retryable(e) or attempt == self.max_retries:
+                    self._count('failures')
+                    raise
+                self._count('retries')
+                time.sleep(self._backoff(attempt))
+                continue
+
+            self.breaker.record_success()
+            return result
+
+    def record_live(self, amount=1):
+        """Registra resultados obtidos do provedor"""
+        self._count('live', amount)
+
+    def record_fallback(self, amount=1):
+        """Registra resultados substituídos por dados simulados"""
+        self._count('fallback', amount)
+
+    def stats(self):
+        """Retorna os contadores e o estado do disjuntor"""
+        with self._lock:
+            stats = dict(self.counters)
+        stats['circuit'] = self.breaker.state
+        return stats
@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+from config.config import Config
+
+
+def rank_trends(trends, cross_weight=None):
+    """Pontua e ordena tendências de todas as plataformas em uma passada vetorizada
+
+    O Google entrega um índice de 0 a 100 e as redes sociais entregam
+    contagens absolutas, então o volume de cada plataforma é normalizado
+    (escala logarítmica, 0 a 100 em relação ao maior volume da plataforma).
+    Termos presentes em várias plataformas recebem também uma pontuação
+    cruzada (média normalizada × cobertura). Cada tendência ganha 'score',
+    'cross_score', 'platform_count' e 'rank'; a lista volta ordenada.
+    """
+    if not trends:
+        return []
+    cross_weight = Config.SCORE_CROSS_PLATFORM_WEIGHT if cross_weight is None else cross_weight
+
+    frame = pd.DataFrame({
+        'key': [trend['term'].strip().lower() for trend in trends],
+        'platform': [trend['platform'] for trend in trends],
+        'volume': np.array([trend['volume'] or 0 for trend in trends], dtype=float)
+    })
+
+    # Normalização por plataforma: log(1 + volume) / log(1 + maior volume)
+    frame['scaled'] = np.log1p(frame['volume'].clip(lower=0))
+    peak = frame.groupby('platform')['scaled'].transform('max').to_numpy()
+    normalized = np.divide(frame['scaled'].to_numpy(), peak, out=np.zeros(len(frame)), where=peak > 0) * 100
+    frame['normalized'] = normalized
+
+    # Pontuação cruzada: média normalizada do termo × fração das plataformas em que aparece
+    by_term = frame.groupby('key')
+    platform_count = by_term['platform'].transform('nunique').to_numpy()
+    coverage = platform_count / max(1, frame['platform'].nunique())
+    cross = by_term['normalized'].transform('mean').to_numpy() * coverage
+
+    score = (1 - cross_weight) * normalized + cross_weight * cross
+
+    # Ordem estável: pontuação e, no empate, volume bruto
+    order = np.lexsort((-frame['volume'].to_numpy(), -score))
+
+    ranked = []
+    for position, index in enumerate(order, start=1):
+        trend = trends[index]
+        trend['score'] = round(float(score[index]), 2)
+        trend['cross_score'] = round(float(cross[index]), 2)
+        trend['platform_count'] = int(platform_count[index])
+        trend['rank'] = position
+        ranked.append(trend)
+    return ranked
@@ -1,36 +1,254 @@
-from database.db_manager import Database
+import base64
+import time
+from config.config import Config
+from app.models.metrics import timed_query
+from app.models.export import FORMATS, export_stream, parse_day
+from database.db_manager import EXPORT_COLUMNS, Database, today
 
 class TrendModel:
     """Model para gerenciar dados de tendências"""
     
-    def __init__(self):
-        self.db = Database()
+    def __init__(self, db=None):
+        self.db = db or Database()
     
     def save_trend(self, term, platform, search_volume, region=None):
         """Salva uma tendência"""
         return self.db.save_trend(term, platform, search_volume, region)
     
-    def get_trends_by_platform(self, platform, limit=50):
+    @timed_query('save_trends_bulk')
+    def save_trends_bulk(self, rows, chunk_size=None, from_collection=False):
+        """Salva várias tendências de uma vez"""
+        return self.db.save_trends_bulk(rows, chunk_size, from_collection)
+    
+    @timed_query('save_collected_trends')
+    def save_collected_trends(self, trends, from_collection=False):
+        """Salva o resultado de uma busca ou coleta (volume nacional e por região) e o histórico
+        
+        from_collection=True só para jobs de coleta: essas linhas formam o
+        snapshot de tendências do momento. Resultados de fallback (dados
+        simulados) não são gravados, para não voltarem depois como dados reais;
+        só a série do provedor, quando veio, entra no histórico.
+        """
+        trends = list(trends)
+        live = [trend for trend in trends if trend.get('source') != 'fallback']
+        saved = self.save_trends_bulk(self._trend_rows(live), from_collection=from_collection)
+        self.db.series.append(self._trend_series(
+            live + [trend for trend in trends if trend.get('source') == 'fallback' and trend.get('series')]
+        ))
+        return saved
+    
+    def _trend_series(self, trends):
+        """Pontos de histórico de cada tendência
+        
+        Usa a série do provedor quando existe; senão, o volume no momento da coleta.
+        """
+        now = time.time()
+        series = {}
+        for trend in trends:
+            points = trend.get('series') or [(now, trend['volume'])]
+            series.setdefault((trend['term'], trend['platform']), []).extend(points)
+        return series
+    
+    def _trend_rows(self, trends):
+        """Gera as linhas (termo, plataforma, volume, região) de cada tendência"""
+        for trend in trends:
+            # Região None guarda o volume nacional do termo
+            yield (trend['term'], trend['platform'], trend['volume'], None)
+            regions = trend['regions']
+            if isinstance(regions, dict):
+                regions = regions.items()
+            for region, volume in regions:
+                yield (trend['term'], trend['platform'], volume, region)
+    
+    @timed_query('get_latest_snapshot')
+    def get_latest_snapshot(self, limit=None):
+        """Busca a última coleta materializada no formato do agregador"""
+        trends = {}
+        for term, platform, volume, region in self.db.get_latest_snapshot():
+            trend = trends.setdefault((term, platform), {
+                'term': term,
+                'platform': platform,
+                'volume': None,
+                'regions': {}
+            })
+            if region is None:
+                trend['volume'] = volume
+            else:
+                trend['regions'][region] = volume
+        
+        snapshot = list(trends.values())
+        for trend in snapshot:
+            # Coletas antigas não guardavam o volume nacional
+            if trend['volume'] is None:
+                trend['volume'] = sum(trend['regions'].values())
+            trend['regions'] = dict(sorted(trend['regions'].items(), key=lambda x: x[1], reverse=True))
+        
+        # pandas só é carregado quando o ranking é pedido pela primeira vez
+        from app.models.scoring import rank_trends
+        snapshot = rank_trends(snapshot)
+        return snapshot[:limit] if limit else snapshot
+    
+    @timed_query('get_regional_matrix')
+    def get_regional_matrix(self, term, max_age=None, platforms=None):
+        """Monta a análise regional de um termo a partir do banco
+        
+        Retorna {'results': [...], 'regional_data': {estado: {plataforma: volume}}}
+        ou None se não houver dados, se estiverem mais velhos que max_age
+        segundos ou se faltar alguma das plataformas informadas.
+        """
+        max_age = Config.REGIONAL_MAX_AGE_SECONDS if max_age is None else max_age
+        rows = self.db.get_regional_matrix(term)
+        
+        updated = [updated_at for region, platform, volume, updated_at in rows if updated_at]
+        if not updated or time.time() - max(updated) > max_age:
+            return None
+        # Plataformas que o coletor não viu precisam ser buscadas nos provedores
+        if platforms and not set(platforms) <= {platform for region, platform, volume, updated_at in rows}:
+            return None
+        
+        results = {}
+        regional_data = {}
+        for region, platform, volume, updated_at in rows:
+            result = results.setdefault(platform, {
+                'term': term,
+                'platform': platform,
+                'volume': None,
+                'regions': []
+            })
+            if region is None:
+                result['volume'] = volume
+            else:
+                result['regions'].append((region, volume))
+                regional_data.setdefault(region, {})[platform] = volume
+        
+        for result in results.values():
+            result['regions'].sort(key=lambda x: x[1], reverse=True)
+            if result['volume'] is None:
+                result['volume'] = sum(volume for region, volume in result['regions'])
+        
+        # Estados com maior volume somado primeiro
+        regional_data = dict(sorted(
+            regional_data.items(), key=lambda item: sum(item[1].values()), reverse=True
+        ))
+        # Mesma ordem de plataformas da busca nos provedores
+        order = {platform: index for index, platform in enumerate(Config.PLATFORMS)}
+        results = sorted(results.values(), key=lambda result: order.get(result['platform'], len(order)))
+        return {'results': results, 'regional_data': regional_data}
+    
+    @timed_query('get_history')
+    def get_history(self, term, platform, start=None, end=None, resolution=None):
+        """Histórico [(timestamp, volume)] de um termo em uma plataforma"""
+        return self.db.series.get_range(term, platform, start, end, resolution)
+    
+    @timed_query('compact_history')
+    def compact_history(self):
+        """Agrega e expira os pontos antigos do histórico"""
+        return self.db.series.compact()
+    
+    @timed_query('compact_trends')
+    def compact_trends(self):
+        """Aplica a retenção das tendências e libera o espaço no arquivo do banco"""
+        current_day = today()
+        deleted = self.db.prune_trends(
+            current_day - Config.TRENDS_RETENTION_DAYS,
+            current_day - Config.TRENDS_DAILY_RETENTION_DAYS
+        )
+        deleted['vacuumed_pages'] = self.db.incremental_vacuum(Config.VACUUM_PAGES_PER_RUN)
+        return deleted
+    
+    @timed_query('get_trends_by_platform')
+    def get_trends_by_platform(self, platform, limit=50, after=None):
         """Busca tendências por plataforma"""
-        return self.db.get_trends(platform=platform, limit=limit)
+        return self.db.get_ranking(platform=platform, limit=limit, after=after)
     
-    def get_all_trends(self, limit=100):
+    @timed_query('get_all_trends')
+    def get_all_trends(self, limit=100, after=None):
         """Busca todas as tendências"""
-        return self.db.get_trends(limit=limit)
+        return self.db.get_ranking(limit=limit, after=after)
+    
+    @timed_query('get_ranking_stats')
+    def get_ranking_stats(self, platform=None):
+        """Estatísticas do ranking (calculadas no banco)"""
+        totals, by_platform = self.db.get_ranking_stats(platform)
+        return {
+            'terms': totals[0],
+            'platforms': totals[1],
+            'total_volume': totals[2],
+            'regions': totals[3],
+            'by_platform': [
+                {'platform': name, 'terms': terms, 'total_volume': volume}
+                for name, terms, volume in by_platform
+            ]
+        }
+    
+    def iter_trends(self, platform=None, after=None, limit=None):
+        """Percorre o ranking linha a linha (para respostas em streaming)"""
+        return self.db.iter_ranking(platform=platform, after=after, limit=limit)
+    
+    def encode_cursor(self, trend):
+        """Gera o cursor opaco (volume, id) de uma linha do ranking"""
+        raw = f"{trend[2]}:{trend[5]}".encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+    
+    def decode_cursor(self, cursor):
+        """Converte um cursor em (volume, id); ValueError se inválido"""
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            volume, trend_id = base64.urlsafe_b64decode(padded).decode().split(':')
+            return int(volume), int(trend_id)
+        except Exception:
+            raise ValueError(f"Cursor inválido: {cursor}")
+    
+    @timed_query('suggest_terms')
+    def suggest_terms(self, prefix, limit=None):
+        """Sugestões de termos já coletados ou pesquisados (autocompletar)"""
+        rows = self.db.suggest_terms(prefix, limit or Config.SUGGEST_LIMIT)
+        return [
+            {'term': term, 'volume': volume, 'searches': searches, 'stored': volume is not None}
+            for term, volume, searches in rows
+        ]
     
+    @timed_query('get_popular_searches')
+    def get_popular_searches(self, window_hours=None, limit=None):
+        """Termos mais pesquisados na janela recente"""
+        window_hours = Config.PREWARM_WINDOW_HOURS if window_hours is None else window_hours
+        since = time.time() - window_hours * 3600
+        return [term for term, searches, last_search in
+                self.db.get_popular_searches(since, limit or Config.PREWARM_MAX_TERMS)]
+    
+    def export(self, table, fmt, start=None, end=None, platform=None, region=None, batch_size=None):
+        """Exporta trends ou user_searches em streaming (bytes) no formato fmt
+        
+        start e end são datas AAAA-MM-DD inclusivas. Parâmetros inválidos geram
+        ValueError antes de qualquer byte ser gerado.
+        """
+        if fmt not in FORMATS:
+            raise ValueError(f'Formato desconhecido: {fmt}')
+        batches = self.db.iter_export(
+            table, parse_day(start), parse_day(end), platform, region,
+            batch_size or Config.EXPORT_BATCH_SIZE
+        )
+        return export_stream(EXPORT_COLUMNS[table], batches, fmt)
+    
+    def get_data_version(self):
+        """(versão, timestamp da última gravação) dos dados de tendências"""
+        return self.db.get_data_version()
+    
+    @timed_query('save_user_search')
     def save_user_search(self, search_term):
         """Salva pesquisa do usuário"""
         return self.db.save_user_search(search_term)
     
     def format_trends_for_display(self, trends):
         """Formata tendências para exibição"""
-        formatted = []
-        for trend in trends:
-            formatted.append({
-                'term': trend[0],
-                'platform': trend[1],
-                'search_volume': trend[2],
-                'region': trend[3] or 'Brasil',
-                'date': trend[4]
-            })
-        return formatted
\ No newline at end of file
+        return [self.format_trend(trend) for trend in trends]
+    
+    def format_trend(self, trend):
+        """Formata uma tendência para exibição"""
+        return {
+            'term': trend[0],
+            'platform': trend[1],
+            'search_volume': trend[2],
+            'region': trend[3] or 'Brasil',
+            'date': trend[4]
+        }
\ No newline at end of file
@@ -1,18 +1,53 @@
-from pytrends.request import TrendReq
+import asyncio
 import requests
 import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+from config.config import Config
+from app.models.collection_engine import CollectionEngine, CollectionTask
+from app.models.cache import ResultCache, create_cache
+from app.models.resilience import CircuitBreaker, ResilientClient, TokenBucket
+from app.models.providers import GoogleProvider, ProviderRegistry, SocialProvider
+from app.models.metrics import observe_provider_call, provider_results
+
+def _create_trendreq():
+    # pytrends (e pandas) só são importados quando o Google é consultado
+    from pytrends.request import TrendReq
+    return TrendReq(hl='pt-BR', tz=180)
 
 class GoogleTrendsService:
     """Serviço para buscar tendências do Google"""
     
-    def __init__(self):
-        self.pytrends = TrendReq(hl='pt-BR', tz=180)
+    def __init__(self, client_factory=None):
+        # TrendReq guarda o payload como estado interno, então cada thread
+        # do motor de coleta precisa do seu próprio cliente
+        self._local = threading.local()
+        self.client_factory = client_factory or _create_trendreq
+        # Limite de taxa, retentativas e disjuntor são compartilhados
+        self.client = ResilientClient(
+            'google',
+            rate_limiter=TokenBucket(Config.GOOGLE_RATE_LIMIT_PER_MINUTE / 60, Config.GOOGLE_RATE_BURST),
+            breaker=CircuitBreaker(Config.GOOGLE_BREAKER_THRESHOLD, Config.GOOGLE_BREAKER_RESET_SECONDS),
+            max_retries=Config.GOOGLE_MAX_RETRIES,
+            backoff_base=Config.GOOGLE_BACKOFF_BASE_SECONDS,
+            backoff_max=Config.GOOGLE_BACKOFF_MAX_SECONDS
+        )
+    
+    @property
+    def pytrends(self):
+        """Cliente pytrends da thread atual"""
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = self.client_factory()
+            self._local.client = client
+        return client
     
     def get_trending_searches(self, country='BR'):
         """Busca termos em alta no Google"""
         try:
-            trending = self.pytrends.trending_searches(pn=country)
+            trending = self.client.call(lambda: self.pytrends.trending_searches(pn=country))
             return trending[0].tolist()[:20]  # Top 20
         except Exception as e:
             print(f"Erro ao buscar Google Trends: {e}")
@@ -20,35 +55,57 @@ class GoogleTrendsService:
     
     def get_keyword_data(self, keyword, region='BR'):
         """Busca dados específicos de uma palavra-chave"""
-        try:
-            self.pytrends.build_payload([keyword], timeframe='now 7-d', geo=region)
-            interest_over_time = self.pytrends.interest_over_time()
-            
-            if not interest_over_time.empty:
-                # Média do interesse nos últimos 7 dias
-                avg_interest = interest_over_time[keyword].mean()
-                return int(avg_interest)
-            return 0
-        except Exception as e:
-            print(f"Erro ao buscar dados da palavra-chave {keyword}: {e}")
-            return 0
+        return self.get_batch_data([keyword], region)[keyword][0]
     
     def get_regional_interest(self, keyword):
         """Busca interesse por região"""
+        return self.get_batch_data([keyword])[keyword][1]
+    
+    def _fetch_batch(self, keywords, region):
+        """Monta o payload e lê volume e regiões (uma tentativa)"""
+        self.pytrends.build_payload(keywords, timeframe='now 7-d', geo=region)
+        return self.pytrends.interest_over_time(), self.pytrends.interest_by_region(resolution='REGION')
+    
+    def get_batch_data(self, keywords, region='BR'):
+        """Busca volume e regiões de até 5 palavras-chave com um único payload
+
+        Retorna um dicionário {palavra: (volume, regiões, origem, série)}, onde
+        origem é 'live' ou 'fallback' (dados simulados) e série é a lista
+        [(timestamp, interesse)] horária do período. Os volumes são relativos
+        às palavras do mesmo lote, como no próprio Google Trends.
+        """
+        keywords = list(keywords)[:Config.GOOGLE_BATCH_SIZE]
+        data = {}
         try:
-            self.pytrends.build_payload([keyword], timeframe='now 7-d', geo='BR')
-            regional = self.pytrends.interest_by_region(resolution='REGION')
+            interest_over_time, regional = self.client.call(self._fetch_batch, keywords, region)
+        except Exception as e:
+            print(f"Erro ao buscar dados do lote {keywords}: {e}")
+            for keyword in keywords:
+                data[keyword] = (0, self._get_simulated_brazilian_regions(keyword), 'fallback', [])
+            self.client.record_fallback(len(keywords))
+            return data
+        
+        for keyword in keywords:
+            volume = 0
+            series = []
+            if not interest_over_time.empty and keyword in interest_over_time:
+                # Média do interesse nos últimos 7 dias
+                volume = int(interest_over_time[keyword].mean())
+                # Série completa do período, guardada no histórico
+                series = [
+                    (int(timestamp.timestamp()), float(value))
+                    for timestamp, value in interest_over_time[keyword].items()
+                ]
             
-            if not regional.empty:
-                # Retorna top 5 estados brasileiros
+            if not regional.empty and keyword in regional:
+                # Top 5 estados brasileiros da palavra-chave
                 top_regions = regional.sort_values(by=keyword, ascending=False).head(5)
-                return top_regions.to_dict()[keyword]
+                data[keyword] = (volume, top_regions[keyword].to_dict(), 'live', series)
+                self.client.record_live()
             else:
-                # Fallback com estados brasileiros simulados baseados em população
-                return self._get_simulated_brazilian_regions(keyword)
-        except Exception as e:
-            print(f"Erro ao buscar dados regionais: {e}")
-            return self._get_simulated_brazilian_regions(keyword)
+                data[keyword] = (volume, self._get_simulated_brazilian_regions(keyword), 'fallback', series)
+                self.client.record_fallback()
+        return data
     
     def _get_simulated_brazilian_regions(self, keyword):
         """Simula dados regionais para estados brasileiros"""
@@ -192,103 +249,168 @@ class SocialMediaService:
         
         return estados
 
+def create_registry(facebook_token=None, instagram_token=None, tiktok_key=None, enabled=None):
+    """Registro padrão de provedores (novas redes são registradas aqui)"""
+    registry = ProviderRegistry(enabled)
+    registry.register('Google', lambda: GoogleProvider(GoogleTrendsService()))
+    
+    social_service = SocialMediaService(facebook_token, instagram_token, tiktok_key)
+    registry.register('Facebook', lambda: SocialProvider('Facebook', social_service, social_service.get_facebook_trends))
+    registry.register('Instagram', lambda: SocialProvider('Instagram', social_service, social_service.get_instagram_trends))
+    registry.register('TikTok', lambda: SocialProvider('TikTok', social_service, social_service.get_tiktok_trends))
+    registry.register('YouTube', lambda: SocialProvider('YouTube', social_service, social_service.get_youtube_trends))
+    return registry
+
 class TrendsAggregator:
     """Agregador de todas as fontes de tendências"""
     
-    def __init__(self, facebook_token=None, instagram_token=None, tiktok_key=None):
-        self.google_service = GoogleTrendsService()
-        self.social_service = SocialMediaService(facebook_token, instagram_token, tiktok_key)
+    def __init__(self, facebook_token=None, instagram_token=None, tiktok_key=None, engine=None, cache=None, registry=None):
+        self.registry = registry or create_registry(facebook_token, instagram_token, tiktok_key)
+        self.engine = engine or CollectionEngine(
+            max_workers=Config.COLLECTOR_MAX_WORKERS,
+            deadline=Config.COLLECTOR_DEADLINE_SECONDS,
+            provider_limits=self.registry.concurrency_limits(),
+            rate_limiters=self.registry.rate_limiters()
+        )
+        self.cache = cache if cache is not None else create_cache()
+        self._api_executor = None
+        self._api_executor_lock = threading.Lock()
     
-    def get_all_trends(self):
-        """Busca tendências de todas as plataformas"""
-        all_trends = []
-        
-        # Google Trends
-        google_trends = self.google_service.get_trending_searches()
-        for term in google_trends:
-            volume = self.google_service.get_keyword_data(term)
-            all_trends.append({
-                'term': term,
-                'platform': 'Google',
-                'volume': volume,
-                'regions': self.google_service.get_regional_interest(term)
-            })
+    def _result(self, provider, row):
+        """Monta o dicionário de resultado a partir de uma linha do provedor"""
+        term, volume, regions, source, series = row
+        return {
+            'term': term,
+            'platform': provider.name,
+            'volume': volume,
+            # Provedores sem dados regionais não geram linhas por região
+            'regions': regions if provider.supports_regions else {},
+            'source': source,
+            'series': series
+        }
+    
+    def _call_fetch(self, provider, terms):
+        """Chama o fetch do provedor registrando duração, falhas e origem dos dados"""
+        rows = observe_provider_call(provider.name, 'fetch', provider.fetch, terms)
+        for row in rows:
+            provider_results.inc(provider.name, row[3])
+        return rows
+    
+    def _fetch(self, provider, terms):
+        """Coleta um lote de termos de um provedor"""
+        rows = self._call_fetch(provider, terms)
         
-        # Facebook
-        facebook_trends = self.social_service.get_facebook_trends()
-        for term in facebook_trends:
-            volume = self.social_service.search_term_volume(term, 'facebook')
-            regions = self.social_service.get_brazilian_regions_for_social(term, 'facebook')
-            all_trends.append({
-                'term': term,
-                'platform': 'Facebook',
-                'volume': volume,
-                'regions': regions
-            })
+        # Dados recém-coletados alimentam o cache das buscas individuais, mas só
+        # de lotes de um termo: em lotes maiores (Google) os volumes e as regiões
+        # são relativos aos outros termos do payload, não à busca isolada
+        if len(terms) > 1:
+            return rows
+        for row in rows:
+            result = self._result(provider, row)
+            if result['source'] != 'fallback':
+                self.cache.set(ResultCache.make_key(result['term'], provider.name), result)
+        return rows
+    
+    def get_all_trends(self, platforms=None):
+        """Busca tendências de todos os provedores habilitados (ou só dos informados)"""
+        providers = self.registry.providers(platforms)
         
-        # Instagram
-        instagram_trends = self.social_service.get_instagram_trends()
-        for term in instagram_trends:
-            volume = self.social_service.search_term_volume(term, 'instagram')
-            regions = self.social_service.get_brazilian_regions_for_social(term, 'instagram')
-            all_trends.append({
-                'term': term,
-                'platform': 'Instagram',
-                'volume': volume,
-                'regions': regions
-            })
+        # Etapa 1: listar termos em alta de todos os provedores em paralelo
+        listing_tasks = [
+            CollectionTask(provider.name, observe_provider_call, provider.name, 'list', provider.list_trending)
+            for provider in providers
+        ]
+        started = time.monotonic()
+        listings = self.engine.run(listing_tasks)
         
-        # TikTok
-        tiktok_trends = self.social_service.get_tiktok_trends()
-        for term in tiktok_trends:
-            volume = self.social_service.search_term_volume(term, 'tiktok')
-            regions = self.social_service.get_brazilian_regions_for_social(term, 'tiktok')
-            all_trends.append({
-                'term': term,
-                'platform': 'TikTok',
-                'volume': volume,
-                'regions': regions
-            })
+        # Etapa 2: detalhar os termos de cada provedor
+        remaining = max(0, self.engine.deadline - (time.monotonic() - started))
+        all_trends = self._collect_terms(zip(providers, listings), remaining)
         
-        # YouTube
-        youtube_trends = self.social_service.get_youtube_trends()
-        for term in youtube_trends:
-            volume = self.social_service.search_term_volume(term, 'youtube')
-            regions = self.social_service.get_brazilian_regions_for_social(term, 'youtube')
-            all_trends.append({
-                'term': term,
-                'platform': 'YouTube',
-                'volume': volume,
-                'regions': regions
-            })
+        # Ordenar pela pontuação normalizada entre plataformas
+        from app.models.scoring import rank_trends
+        return rank_trends(all_trends)
+    
+    def _collect_terms(self, provider_terms, deadline):
+        """Detalha termos [(provedor, termos)] em lotes paralelos do tamanho aceito por cada provedor"""
+        term_tasks = []
+        for provider, terms in provider_terms:
+            terms = list(dict.fromkeys(terms or []))
+            batch_size = max(1, provider.batch_size)
+            for start in range(0, len(terms), batch_size):
+                term_tasks.append(CollectionTask(provider.name, self._fetch, provider, terms[start:start + batch_size]))
+        details = self.engine.run(term_tasks, deadline=deadline)
         
-        # Ordenar por volume
-        all_trends.sort(key=lambda x: x['volume'], reverse=True)
+        all_trends = []
+        for task, detail in zip(term_tasks, details):
+            # Termos que falharam ou estouraram o prazo ficam de fora (resultado parcial)
+            provider = task.args[0]
+            for row in detail or []:
+                all_trends.append(self._result(provider, row))
         return all_trends
     
+    def refresh_terms(self, terms, deadline=None):
+        """Busca termos em todos os provedores ignorando o cache (e o renova)"""
+        deadline = self.engine.deadline if deadline is None else deadline
+        return self._collect_terms([(provider, terms) for provider in self.registry.providers()], deadline)
+    
+    def _search_term(self, provider, term):
+        """Busca um termo em um provedor"""
+        return self._result(provider, self._call_fetch(provider, [term])[0])
+    
+    def _search_cached(self, provider, term):
+        """Busca um termo em um provedor passando pelo cache"""
+        # Dados de fallback não entram no cache
+        return self.cache.get_or_compute(
+            ResultCache.make_key(term, provider.name),
+            lambda: self._search_term(provider, term),
+            should_cache=lambda result: result['source'] != 'fallback'
+        )
+    
     def search_specific_term(self, term):
-        """Busca dados específicos de um termo"""
-        results = []
-        
-        # Google
-        google_volume = self.google_service.get_keyword_data(term)
-        google_regions = self.google_service.get_regional_interest(term)
-        results.append({
-            'term': term,
-            'platform': 'Google',
-            'volume': google_volume,
-            'regions': google_regions
-        })
+        """Busca dados específicos de um termo em cada provedor habilitado"""
+        return [self._search_cached(provider, term) for provider in self.registry.providers()]
+    
+    def _executor(self):
+        """Pool compartilhado das buscas feitas pela API assíncrona"""
+        with self._api_executor_lock:
+            if self._api_executor is None:
+                self._api_executor = ThreadPoolExecutor(
+                    max_workers=Config.API_MAX_INFLIGHT, thread_name_prefix='api-lookup'
+                )
+            return self._api_executor
+    
+    async def search_specific_term_async(self, term, timeout=None):
+        """Busca um termo em todos os provedores ao mesmo tempo, sem bloquear o loop
         
-        # Redes sociais (volumes simulados)
-        for platform in ['Facebook', 'Instagram', 'TikTok', 'YouTube']:
-            volume = self.social_service.search_term_volume(term, platform.lower())
-            regions = self.social_service.get_brazilian_regions_for_social(term, platform.lower())
-            results.append({
-                'term': term,
-                'platform': platform,
-                'volume': volume,
-                'regions': regions
-            })
+        Cada provedor tem prazo próprio; os que falham ou estouram o prazo
+        ficam de fora (resultado parcial).
+        """
+        timeout = Config.API_PROVIDER_TIMEOUT_SECONDS if timeout is None else timeout
+        loop = asyncio.get_running_loop()
+        providers = self.registry.providers()
+        lookups = [
+            asyncio.wait_for(loop.run_in_executor(self._executor(), self._search_cached, provider, term), timeout)
+            for provider in providers
+        ]
         
-        return results
\ No newline at end of file
+        results = []
+        for provider, result in zip(providers, await asyncio.gather(*lookups, return_exceptions=True)):
+            if isinstance(result, asyncio.TimeoutError):
+                print(f"Tempo esgotado ao buscar '{term}' em {provider.name}")
+            elif isinstance(result, Exception):
+                print(f"Erro ao buscar '{term}' em {provider.name}: {result}")
+            else:
+                results.append(result)
+        return results
+    
+    async def search_terms_async(self, terms, timeout=None):
+        """Busca vários termos em paralelo; retorna {termo: resultados}"""
+        results = await asyncio.gather(*(self.search_specific_term_async(term, timeout) for term in terms))
+        return dict(zip(terms, results))
+    
+    def get_provider_stats(self):
+        """Contadores dos provedores e do cache"""
+        stats = self.registry.stats()
+        stats['cache'] = self.cache.stats()
+        return stats
@@ -0,0 +1,64 @@
+import threading
+from config.config import Config
+
+
+class ServiceContainer:
+    """Serviços da aplicação, criados só no primeiro uso
+
+    Importar ou iniciar a aplicação não abre o banco nem carrega pytrends e
+    pandas; cada serviço é construído (uma única vez) quando alguém o pede.
+    """
+
+    def __init__(self, config=Config):
+        self.config = config
+        self._instances = {}
+        self._lock = threading.RLock()
+
+    def _get(self, name, factory):
+        instance = self._instances.get(name)
+        if instance is None:
+            with self._lock:
+                instance = self._instances.get(name)
+                if instance is None:
+                    instance = factory()
+                    self._instances[name] = instance
+        return instance
+
+    def peek(self, name):
+        """Retorna o serviço se já foi criado, sem criá-lo"""
+        return self._instances.get(name)
+
+    @property
+    def db(self):
+        from database.db_manager import Database
+        return self._get('db', Database)
+
+    @property
+    def trend_model(self):
+        from app.models.trend_model import TrendModel
+        return self._get('trend_model', lambda: TrendModel(self.db))
+
+    @property
+    def aggregator(self):
+        from app.models.trends_service import TrendsAggregator
+        return self._get('aggregator', TrendsAggregator)
+
+    @property
+    def scheduler(self):
+        return self._get('scheduler', self._create_scheduler)
+
+    def _create_scheduler(self):
+        from app.models.collector import CollectionScheduler
+        config = self.config
+        scheduler = CollectionScheduler(self.aggregator, self.trend_model)
+        scheduler.add_maintenance('histórico', config.SERIES_COMPACT_INTERVAL_SECONDS, self.trend_model.compact_history)
+        scheduler.add_maintenance('retenção', config.RETENTION_INTERVAL_SECONDS, self.trend_model.compact_trends)
+        if config.PREWARM_ENABLED:
+            scheduler.add_maintenance('pré-aquecimento', config.PREWARM_INTERVAL_SECONDS, scheduler.prewarm)
+        return scheduler
+
+    def start_collector(self):
+        """Inicia o coletor em segundo plano sem atrasar a subida da aplicação"""
+        thread = threading.Thread(target=lambda: self.scheduler.start(), name='trends-collector-start', daemon=True)
+        thread.start()
+        return thread
@@ -0,0 +1 @@
+"""Benchmarks com provedores locais e determinísticos (python -m benchmarks.run)"""
@@ -0,0 +1,120 @@
+"""Provedores falsos, locais e determinísticos, com latência configurável"""
+
+import random
+import time
+import zlib
+import pandas as pd
+from app.models.providers import GoogleProvider, ProviderRegistry, SocialProvider
+from app.models.trends_service import GoogleTrendsService, SocialMediaService
+
+ESTADOS = [
+    'São Paulo', 'Rio de Janeiro', 'Minas Gerais', 'Bahia', 'Paraná',
+    'Rio Grande do Sul', 'Pernambuco', 'Ceará', 'Pará', 'Santa Catarina',
+    'Goiás', 'Maranhão', 'Paraíba', 'Espírito Santo', 'Amazonas',
+    'Mato Grosso', 'Rio Grande do Norte', 'Alagoas', 'Piauí', 'Distrito Federal',
+    'Mato Grosso do Sul', 'Sergipe', 'Rondônia', 'Tocantins', 'Acre', 'Amapá', 'Roraima'
+]
+
+
+def _rng(seed, *parts):
+    """Gerador aleatório estável para a combinação (semente, partes)"""
+    key = ':'.join(str(part) for part in (seed, *parts))
+    return random.Random(zlib.crc32(key.encode()))
+
+
+class FakeTrendReq:
+    """Substituto local do TrendReq do pytrends"""
+
+    def __init__(self, latency=0.0, seed=0, trending_count=20):
+        self.latency = latency
+        self.seed = seed
+        self.trending_count = trending_count
+        self.keywords = []
+
+    def _wait(self):
+        if self.latency:
+            time.sleep(self.latency)
+
+    def build_payload(self, kw_list, cat=0, timeframe='today 5-y', geo='', gprop=''):
+        self._wait()
+        self.keywords = list(kw_list)
+
+    def interest_over_time(self):
+        self._wait()
+        index = pd.date_range('2026-01-01', periods=7 * 24, freq='h')
+        data = {
+            keyword: [_rng(self.seed, keyword).randint(0, 100) for _ in index]
+            for keyword in self.keywords
+        }
+        data['isPartial'] = False
+        return pd.DataFrame(data, index=index)
+
+    def interest_by_region(self, resolution='COUNTRY', inc_low_vol=False, inc_geo_code=False):
+        self._wait()
+        return pd.DataFrame({
+            keyword: [_rng(self.seed, keyword, estado).randint(0, 100) for estado in ESTADOS]
+            for keyword in self.keywords
+        }, index=ESTADOS)
+
+    def trending_searches(self, pn='united_states'):
+        self._wait()
+        return pd.DataFrame({0: [f'tendência {i}' for i in range(self.trending_count)]})
+
+
+class FakeSocialService(SocialMediaService):
+    """SocialMediaService com volumes e regiões determinísticos"""
+
+    def __init__(self, latency=0.0, seed=0):
+        super().__init__()
+        self.latency = latency
+        self.seed = seed
+
+    def _wait(self):
+        if self.latency:
+            time.sleep(self.latency)
+
+    def get_facebook_trends(self):
+        self._wait()
+        return super().get_facebook_trends()
+
+    def get_instagram_trends(self):
+        self._wait()
+        return super().get_instagram_trends()
+
+    def get_tiktok_trends(self):
+        self._wait()
+        return super().get_tiktok_trends()
+
+    def get_youtube_trends(self):
+        self._wait()
+        return super().get_youtube_trends()
+
+    def search_term_volume(self, term, platform):
+        self._wait()
+        return _rng(self.seed, term, platform).randint(1000, 100000)
+
+    def get_brazilian_regions_for_social(self, term, platform):
+        rng = _rng(self.seed, term, platform, 'regiões')
+        regions = {estado: rng.randint(1000, 40000) for estado in rng.sample(ESTADOS, 5)}
+        return dict(sorted(regions.items(), key=lambda x: x[1], reverse=True))
+
+
+def create_fake_registry(latency=0.0, seed=0, enabled=None):
+    """Registro com os mesmos provedores do padrão, mas locais e determinísticos"""
+    registry = ProviderRegistry(enabled)
+
+    def google():
+        service = GoogleTrendsService(client_factory=lambda: FakeTrendReq(latency, seed))
+        # Sem limite de taxa: o benchmark mede o código, não o throttling
+        service.client.rate_limiter = None
+        provider = GoogleProvider(service)
+        provider.rate_limit_per_minute = None
+        return provider
+
+    registry.register('Google', google)
+    social_service = FakeSocialService(latency, seed)
+    registry.register('Facebook', lambda: SocialProvider('Facebook', social_service, social_service.get_facebook_trends))
+    registry.register('Instagram', lambda: SocialProvider('Instagram', social_service, social_service.get_instagram_trends))
+    registry.register('TikTok', lambda: SocialProvider('TikTok', social_service, social_service.get_tiktok_trends))
+    registry.register('YouTube', lambda: SocialProvider('YouTube', social_service, social_service.get_youtube_trends))
+    return registry
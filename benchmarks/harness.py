@@ -0,0 +1,81 @@
+"""Medição de latência (p50/p95/p99) e throughput, e comparação com baselines"""
+
+import json
+import os
+import platform
+import time
+from datetime import datetime
+import numpy as np
+
+
+def measure(name, func, iterations=30, warmup=3):
+    """Executa func(i) várias vezes e resume as latências em milissegundos"""
+    for i in range(warmup):
+        func(i)
+
+    samples = []
+    started = time.perf_counter()
+    for i in range(iterations):
+        call_started = time.perf_counter()
+        func(warmup + i)
+        samples.append(time.perf_counter() - call_started)
+    elapsed = time.perf_counter() - started
+
+    latencies = np.array(samples) * 1000
+    return {
+        'name': name,
+        'iterations': iterations,
+        'mean_ms': round(float(latencies.mean()), 3),
+        'p50_ms': round(float(np.percentile(latencies, 50)), 3),
+        'p95_ms': round(float(np.percentile(latencies, 95)), 3),
+        'p99_ms': round(float(np.percentile(latencies, 99)), 3),
+        'throughput': round(iterations / elapsed, 2) if elapsed else None
+    }
+
+
+def save_baseline(results, path, settings=None):
+    """Grava os resultados como baseline em JSON"""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+            'settings': settings or {},
+            'results': {result['name']: result for result in results}
+        }, f, ensure_ascii=False, indent=2)
+
+
+def load_baseline(path):
+    """Lê um baseline salvo por save_baseline"""
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def compare(results, baseline, threshold=0.25, metric='p95_ms'):
+    """Retorna os benchmarks cujo metric piorou mais que threshold (fração)"""
+    regressions = []
+    for result in results:
+        previous = baseline['results'].get(result['name'])
+        if not previous or not previous.get(metric):
+            continue
+        change = (result[metric] - previous[metric]) / previous[metric]
+        if change > threshold:
+            regressions.append((result['name'], previous[metric], result[metric], change))
+    return regressions
+
+
+def print_report(results, baseline=None, metric='p95_ms'):
+    """Imprime a tabela de resultados (com a variação em relação ao baseline)"""
+    header = f"{'benchmark':<32} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'ops/s':>9}"
+    if baseline:
+        header += f" {'Δ ' + metric:>10}"
+    print(header)
+    print('-' * len(header))
+    for result in results:
+        line = (f"{result['name']:<32} {result['p50_ms']:>9.2f} {result['p95_ms']:>9.2f} "
+                f"{result['p99_ms']:>9.2f} {result['throughput'] or 0:>9.1f}")
+        previous = baseline['results'].get(result['name']) if baseline else None
+        if previous and previous.get(metric):
+            line += f" {(result[metric] - previous[metric]) / previous[metric]:>+10.1%}"
+        print(line)
@@ -0,0 +1,121 @@
+"""Executa os benchmarks com provedores falsos em um banco temporário
+
+Uso:
+    python -m benchmarks.run                      # só imprime os resultados
+    python -m benchmarks.run --save main          # grava benchmarks/baselines/main.json
+    python -m benchmarks.run --compare main       # compara e falha se houver regressão
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+from urllib.parse import quote
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_DIR = os.path.join(ROOT, 'benchmarks', 'baselines')
+
+
+def _prepare_environment(workdir):
+    """Isola o benchmark: banco temporário, cache em memória, sem coletor"""
+    os.makedirs(os.path.join(workdir, 'database'), exist_ok=True)
+    os.chdir(workdir)
+    os.environ['COLLECTOR_ENABLED'] = 'false'
+    os.environ['CACHE_BACKEND'] = 'memory'
+    if ROOT not in sys.path:
+        sys.path.insert(0, ROOT)
+
+
+def build_scenarios(latency, seed):
+    """Monta os cenários (nome, função) sobre a aplicação com provedores falsos"""
+    # Imports depois de preparar o ambiente: Config lê as variáveis na importação
+    from app import create_app
+    from app.models.cache import MemoryCacheBackend, ResultCache
+    from app.models.trends_service import TrendsAggregator
+    from benchmarks.fakes import create_fake_registry
+
+    app = create_app()
+    client = app.test_client()
+    services = app.extensions['services']
+    trend_model = services.trend_model
+
+    aggregator = TrendsAggregator(
+        registry=create_fake_registry(latency, seed),
+        cache=ResultCache(MemoryCacheBackend())
+    )
+    # As rotas usam o agregador do contêiner de serviços da aplicação
+    services.aggregator.registry = create_fake_registry(latency, seed)
+
+    # Dados iniciais para os cenários de leitura
+    collected = aggregator.get_all_trends()
+    for _ in range(3):
+        trend_model.save_collected_trends(collected, from_collection=True)
+    term = collected[0]['term']
+    path_term = quote(term, safe='')
+
+    def route(path):
+        def run(i):
+            response = client.get(path)
+            assert response.status_code == 200, (path, response.status_code)
+            response.close()
+        return run
+
+    return [
+        ('aggregator.get_all_trends', lambda i: aggregator.get_all_trends()),
+        ('aggregator.search_cold', lambda i: aggregator.search_specific_term(f'termo frio {i}')),
+        ('aggregator.search_warm', lambda i: aggregator.search_specific_term(term)),
+        ('db.save_collected_trends', lambda i: trend_model.save_collected_trends(collected)),
+        ('db.get_all_trends', lambda i: trend_model.get_all_trends(limit=100)),
+        ('db.get_ranking_stats', lambda i: trend_model.get_ranking_stats()),
+        ('db.get_latest_snapshot', lambda i: trend_model.get_latest_snapshot()),
+        ('db.get_regional_matrix', lambda i: trend_model.get_regional_matrix(term)),
+        ('route /', route('/')),
+        ('route /ranking', route('/ranking')),
+        ('route /api/trends', route('/api/trends?limit=100')),
+        ('route /api/trends ndjson', route('/api/trends?format=ndjson&limit=1000')),
+        ('route /api/search', route(f'/api/search/{path_term}')),
+        ('route /regional', route(f'/regional/{path_term}')),
+    ]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmarks do sistema de tendências')
+    parser.add_argument('--iterations', type=int, default=30, help='execuções medidas por cenário')
+    parser.add_argument('--warmup', type=int, default=3, help='execuções de aquecimento por cenário')
+    parser.add_argument('--latency', type=float, default=0.0, help='latência simulada por chamada aos provedores (s)')
+    parser.add_argument('--seed', type=int, default=42, help='semente dos dados falsos')
+    parser.add_argument('--only', help='roda só os cenários cujo nome contém este texto')
+    parser.add_argument('--save', metavar='NOME', help='grava o resultado como baseline')
+    parser.add_argument('--compare', metavar='NOME', help='compara com um baseline salvo')
+    parser.add_argument('--threshold', type=float, default=0.25, help='piora máxima aceita no p95 (fração)')
+    args = parser.parse_args(argv)
+
+    _prepare_environment(tempfile.mkdtemp(prefix='trends-bench-'))
+    from benchmarks.harness import compare, load_baseline, measure, print_report, save_baseline
+
+    baseline = None
+    if args.compare:
+        baseline = load_baseline(os.path.join(BASELINE_DIR, f'{args.compare}.json'))
+
+    results = []
+    for name, func in build_scenarios(args.latency, args.seed):
+        if args.only and args.only not in name:
+            continue
+        results.append(measure(name, func, args.iterations, args.warmup))
+    print_report(results, baseline)
+
+    if args.save:
+        settings = {'iterations': args.iterations, 'latency': args.latency, 'seed': args.seed}
+        save_baseline(results, os.path.join(BASELINE_DIR, f'{args.save}.json'), settings)
+        print(f"Baseline salvo: benchmarks/baselines/{args.save}.json")
+
+    if baseline:
+        regressions = compare(results, baseline, args.threshold)
+        for name, before, after, change in regressions:
+            print(f"Regressão em {name}: p95 {before:.2f} ms → {after:.2f} ms ({change:+.1%})")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -15,7 +15,124 @@ class Config:
     
     # Configurações do Banco
     DATABASE_URL = os.environ.get('DATABASE_URL') or 'sqlite:///database/trends.db'
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 8))
+    SQLITE_SYNCHRONOUS = os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL')
+    SQLITE_CACHE_SIZE_KB = int(os.environ.get('SQLITE_CACHE_SIZE_KB', 16384))
+    SQLITE_MMAP_SIZE = int(os.environ.get('SQLITE_MMAP_SIZE', 268435456))
+    BULK_INSERT_CHUNK_SIZE = int(os.environ.get('BULK_INSERT_CHUNK_SIZE', 500))
+    # Nova leitura do mesmo termo/plataforma/região no dia: 'latest' (substitui) ou 'max' (maior volume);
+    # INSERTs diretos na view trends sempre substituem
+    TRENDS_UPSERT_STRATEGY = os.environ.get('TRENDS_UPSERT_STRATEGY', 'latest')
+    # Retenção: dias de leituras (trend_points e matriz regional) e de agregados diários
+    TRENDS_RETENTION_DAYS = int(os.environ.get('TRENDS_RETENTION_DAYS', 90))
+    TRENDS_DAILY_RETENTION_DAYS = int(os.environ.get('TRENDS_DAILY_RETENTION_DAYS', 730))
+    RETENTION_INTERVAL_SECONDS = int(os.environ.get('RETENTION_INTERVAL_SECONDS', 86400))
+    VACUUM_PAGES_PER_RUN = int(os.environ.get('VACUUM_PAGES_PER_RUN', 2000))
     
     # Configurações Gerais
+    PLATFORMS = ['Google', 'Facebook', 'Instagram', 'TikTok', 'YouTube']
+    # Provedores habilitados nesta instalação, ex.: "Google,YouTube"
+    ENABLED_PROVIDERS = [
+        name.strip() for name in os.environ.get('ENABLED_PROVIDERS', ','.join(PLATFORMS)).split(',')
+        if name.strip()
+    ]
     DEFAULT_SEARCH_DAYS = int(os.environ.get('DEFAULT_SEARCH_DAYS', 3))
-    MAX_RESULTS_PER_PLATFORM = int(os.environ.get('MAX_RESULTS_PER_PLATFORM', 50))
\ No newline at end of file
+    MAX_RESULTS_PER_PLATFORM = int(os.environ.get('MAX_RESULTS_PER_PLATFORM', 50))
+    
+    # Limites da API (/api/trends)
+    API_MAX_LIMIT = int(os.environ.get('API_MAX_LIMIT', 500))
+    API_MAX_STREAM_LIMIT = int(os.environ.get('API_MAX_STREAM_LIMIT', 1000000))
+    # Autocompletar (/api/suggest)
+    SUGGEST_LIMIT = int(os.environ.get('SUGGEST_LIMIT', 10))
+    SUGGEST_MIN_CHARS = int(os.environ.get('SUGGEST_MIN_CHARS', 2))
+    # Buscas assíncronas da API (/api/search): prazo por provedor, termos por requisição e buscas simultâneas
+    API_PROVIDER_TIMEOUT_SECONDS = float(os.environ.get('API_PROVIDER_TIMEOUT_SECONDS', 20))
+    API_MAX_TERMS = int(os.environ.get('API_MAX_TERMS', 10))
+    API_MAX_INFLIGHT = int(os.environ.get('API_MAX_INFLIGHT', 32))
+    
+    # Servidor de produção (serve.py)
+    SERVER_HOST = os.environ.get('SERVER_HOST', '0.0.0.0')
+    SERVER_PORT = int(os.environ.get('SERVER_PORT', 5000))
+    SERVER_THREADS = int(os.environ.get('SERVER_THREADS', 8))
+    
+    # Peso da pontuação cruzada (termos em várias plataformas) no ranking da coleta
+    SCORE_CROSS_PLATFORM_WEIGHT = float(os.environ.get('SCORE_CROSS_PLATFORM_WEIGHT', 0.3))
+    
+    # Idade máxima (segundos) da matriz regional antes de buscar nos provedores
+    REGIONAL_MAX_AGE_SECONDS = int(os.environ.get('REGIONAL_MAX_AGE_SECONDS', 21600))
+    
+    # Motor de coleta concorrente
+    COLLECTOR_MAX_WORKERS = int(os.environ.get('COLLECTOR_MAX_WORKERS', 8))
+    COLLECTOR_DEADLINE_SECONDS = float(os.environ.get('COLLECTOR_DEADLINE_SECONDS', 60))
+    # Termos por payload do Google Trends (máximo aceito pela API: 5)
+    GOOGLE_BATCH_SIZE = min(5, int(os.environ.get('GOOGLE_BATCH_SIZE', 5)))
+    # Cliente resiliente do Google Trends
+    GOOGLE_RATE_LIMIT_PER_MINUTE = float(os.environ.get('GOOGLE_RATE_LIMIT_PER_MINUTE', 30))
+    GOOGLE_RATE_BURST = int(os.environ.get('GOOGLE_RATE_BURST', 5))
+    GOOGLE_MAX_RETRIES = int(os.environ.get('GOOGLE_MAX_RETRIES', 3))
+    GOOGLE_BACKOFF_BASE_SECONDS = float(os.environ.get('GOOGLE_BACKOFF_BASE_SECONDS', 2))
+    GOOGLE_BACKOFF_MAX_SECONDS = float(os.environ.get('GOOGLE_BACKOFF_MAX_SECONDS', 60))
+    GOOGLE_BREAKER_THRESHOLD = int(os.environ.get('GOOGLE_BREAKER_THRESHOLD', 5))
+    GOOGLE_BREAKER_RESET_SECONDS = int(os.environ.get('GOOGLE_BREAKER_RESET_SECONDS', 300))
+    # Limite de chamadas simultâneas por provedor, ex.: "Google=2,Facebook=4"
+    COLLECTOR_PROVIDER_LIMITS = {
+        name.strip(): int(limit)
+        for name, limit in (
+            item.split('=') for item in
+            os.environ.get('COLLECTOR_PROVIDER_LIMITS', 'Google=2').split(',') if '=' in item
+        )
+    }
+    
+    # Cache de resultados (backend: memory ou sqlite)
+    CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'memory')
+    CACHE_TTL_SECONDS = int(os.environ.get('CACHE_TTL_SECONDS', 900))
+    CACHE_MAX_ENTRIES = int(os.environ.get('CACHE_MAX_ENTRIES', 1024))
+    CACHE_DB_PATH = os.environ.get('CACHE_DB_PATH', 'database/cache.db')
+    
+    # Coletor em segundo plano
+    COLLECTOR_ENABLED = os.environ.get('COLLECTOR_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+    # Intervalo de coleta (segundos) por provedor, ex.: "Google=3600,Facebook=1800"
+    COLLECTOR_INTERVALS = {
+        name.strip(): int(interval)
+        for name, interval in (
+            item.split('=') for item in
+            os.environ.get(
+                'COLLECTOR_INTERVALS',
+                'Google=3600,Facebook=3600,Instagram=3600,TikTok=3600,YouTube=3600'
+            ).split(',') if '=' in item
+        )
+    }
+    COLLECTOR_JITTER_SECONDS = int(os.environ.get('COLLECTOR_JITTER_SECONDS', 120))
+    COLLECTOR_LOCK_TTL_SECONDS = int(os.environ.get('COLLECTOR_LOCK_TTL_SECONDS', 900))
+    
+    # Pré-aquecimento: renova os termos mais pesquisados nas últimas PREWARM_WINDOW_HOURS
+    # (intervalo menor que CACHE_TTL_SECONDS mantém o cache sempre válido)
+    PREWARM_ENABLED = os.environ.get('PREWARM_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+    PREWARM_INTERVAL_SECONDS = int(os.environ.get('PREWARM_INTERVAL_SECONDS', 600))
+    PREWARM_WINDOW_HOURS = int(os.environ.get('PREWARM_WINDOW_HOURS', 24))
+    PREWARM_MAX_TERMS = int(os.environ.get('PREWARM_MAX_TERMS', 20))
+    PREWARM_BUDGET_SECONDS = float(os.environ.get('PREWARM_BUDGET_SECONDS', 60))
+    
+    # Métricas em /metrics e limites (ms) para registrar consultas e chamadas lentas (0 desliga)
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+    METRICS_SLOW_QUERY_MS = int(os.environ.get('METRICS_SLOW_QUERY_MS', 500))
+    METRICS_SLOW_CALL_MS = int(os.environ.get('METRICS_SLOW_CALL_MS', 10000))
+    
+    # Cache HTTP: ETag/Last-Modified pela versão dos dados e páginas já renderizadas
+    HTTP_CACHE_ENABLED = os.environ.get('HTTP_CACHE_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+    PAGE_CACHE_MAX_ENTRIES = int(os.environ.get('PAGE_CACHE_MAX_ENTRIES', 256))
+    # Compressão das respostas (br se o pacote brotli estiver instalado, senão gzip)
+    COMPRESSION_ENABLED = os.environ.get('COMPRESSION_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+    COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', 500))
+    COMPRESSION_GZIP_LEVEL = int(os.environ.get('COMPRESSION_GZIP_LEVEL', 6))
+    COMPRESSION_BROTLI_QUALITY = int(os.environ.get('COMPRESSION_BROTLI_QUALITY', 5))
+    
+    # Exportação em streaming (/api/export e export.py): linhas lidas por bloco
+    # (cada bloco vira um row group no Parquet)
+    EXPORT_BATCH_SIZE = int(os.environ.get('EXPORT_BATCH_SIZE', 10000))
+    
+    # Séries temporais: dias mantidos em cada resolução antes de agregar/apagar
+    SERIES_HOURLY_RETENTION_DAYS = int(os.environ.get('SERIES_HOURLY_RETENTION_DAYS', 7))
+    SERIES_DAILY_RETENTION_DAYS = int(os.environ.get('SERIES_DAILY_RETENTION_DAYS', 180))
+    SERIES_WEEKLY_RETENTION_DAYS = int(os.environ.get('SERIES_WEEKLY_RETENTION_DAYS', 730))
+    SERIES_COMPACT_INTERVAL_SECONDS = int(os.environ.get('SERIES_COMPACT_INTERVAL_SECONDS', 3600))
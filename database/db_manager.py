@@ -1,63 +1,250 @@
 import sqlite3
 import os
+import queue
+import re
+import threading
+import time
+import weakref
+from contextlib import contextmanager
 from datetime import datetime
+from config.config import Config
+from database.migrations import migrate
+from database.rollups import refresh_daily_rollup, refresh_regional_matrix
+from database.timeseries import TimeSeriesStore
+
+# Pools ativos, para liberar conexões ao fim de cada requisição
+_pools = weakref.WeakSet()
+
+# Como uma nova leitura do mesmo (termo, plataforma, região, dia) atualiza a existente
+UPSERT_STRATEGIES = {
+    'latest': '''
+        search_volume = excluded.search_volume,
+        created_at = CURRENT_TIMESTAMP
+    ''',
+    'max': '''
+        search_volume = MAX(COALESCE(search_volume, excluded.search_volume),
+                            COALESCE(excluded.search_volume, search_volume))
+    '''
+}
+
+# Colunas exportadas por tabela (iter_export)
+EXPORT_COLUMNS = {
+    'trends': ('term', 'platform', 'region', 'search_volume', 'date', 'created_at'),
+    'user_searches': ('search_term', 'search_date')
+}
+
+class ConnectionPool:
+    """Pool de conexões SQLite persistentes, uma por thread em uso"""
+    
+    def __init__(self, db_path, size=5, pragmas=None):
+        self.db_path = db_path
+        self.size = size
+        self.pragmas = pragmas if pragmas is not None else default_pragmas()
+        self._idle = queue.LifoQueue(maxsize=size)
+        self._local = threading.local()
+        _pools.add(self)
+    
+    def _connect(self):
+        """Abre uma conexão configurada com as pragmas do pool"""
+        # A conexão pode ser reutilizada por outra thread depois de devolvida
+        conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+        for name, value in self.pragmas.items():
+            conn.execute(f'PRAGMA {name} = {value}')
+        return conn
+    
+    def acquire(self):
+        """Retorna a conexão da thread atual, pegando uma do pool se preciso"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                conn = self._connect()
+            self._local.conn = conn
+        return conn
+    
+    def release(self):
+        """Devolve a conexão da thread atual ao pool"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            return
+        self._local.conn = None
+        if conn.in_transaction:
+            conn.rollback()
+        try:
+            self._idle.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+    
+    def close_all(self):
+        """Fecha as conexões ociosas e a da thread atual"""
+        self.release()
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+def default_pragmas():
+    """Pragmas de desempenho aplicadas a cada conexão"""
+    return {
+        'journal_mode': 'WAL',
+        'synchronous': Config.SQLITE_SYNCHRONOUS,
+        'cache_size': -Config.SQLITE_CACHE_SIZE_KB,
+        'mmap_size': Config.SQLITE_MMAP_SIZE,
+        'temp_store': 'MEMORY',
+        'busy_timeout': 30000,
+        'foreign_keys': 'ON'
+    }
+
+def today():
+    """Dia atual (UTC) como número de dias desde 1970-01-01"""
+    return int(time.time() // 86400)
+
+def release_connections(exception=None):
+    """Devolve ao pool as conexões usadas pela thread atual (teardown do Flask)"""
+    for pool in list(_pools):
+        pool.release()
+
+def close_all_connections():
+    """Fecha todas as conexões ociosas de todos os pools"""
+    for pool in list(_pools):
+        pool.close_all()
 
 class Database:
     """Classe para gerenciar o banco de dados"""
     
-    def __init__(self, db_path="database/trends.db"):
+    def __init__(self, db_path="database/trends.db", pool_size=None):
+        if Config.TRENDS_UPSERT_STRATEGY not in UPSERT_STRATEGIES:
+            raise ValueError(
+                f"TRENDS_UPSERT_STRATEGY inválida: {Config.TRENDS_UPSERT_STRATEGY} "
+                f"(use {' ou '.join(UPSERT_STRATEGIES)})"
+            )
         self.db_path = db_path
+        self.pool = ConnectionPool(db_path, size=pool_size or Config.DB_POOL_SIZE)
+        # Cache de ids das tabelas de apoio (terms, platforms, regions), só com ids já gravados
+        self._lookup_ids = {}
+        self._lookup_lock = threading.Lock()
+        # Ids criados na transação em andamento de cada thread
+        self._pending = threading.local()
+        # Séries temporais de volume por termo/plataforma
+        self.series = TimeSeriesStore(self)
         self.init_database()
     
     def get_connection(self):
-        """Retorna uma conexão com o banco"""
-        return sqlite3.connect(self.db_path)
+        """Retorna a conexão persistente da thread atual"""
+        return self.pool.acquire()
+    
+    @contextmanager
+    def transaction(self):
+        """Executa um bloco em uma transação (commit ou rollback automático)"""
+        conn = self.get_connection()
+        outermost = getattr(self._pending, 'ids', None) is None
+        if outermost:
+            self._pending.ids = {}
+        try:
+            with conn:
+                yield conn
+            if outermost:
+                # Só depois do commit os ids novos valem para as outras threads
+                with self._lookup_lock:
+                    self._lookup_ids.update(self._pending.ids)
+        finally:
+            # Na transação desfeita os ids criados não existem mais
+            if outermost:
+                self._pending.ids = None
+    
+    def close(self):
+        """Fecha as conexões do banco"""
+        self.pool.close_all()
     
     def init_database(self):
-        """Inicializa o banco de dados com as tabelas necessárias"""
+        """Inicializa o banco de dados aplicando as migrações pendentes"""
         # Criar diretório se não existir
-        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
-        
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        # Tabela de tendências
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS trends (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                term TEXT NOT NULL,
-                platform TEXT NOT NULL,
-                search_volume INTEGER,
-                region TEXT,
-                date_collected DATE,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # Tabela de pesquisas do usuário
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS user_searches (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                search_term TEXT NOT NULL,
-                search_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
+        os.makedirs(os.path.dirname(self.db_path) or '.', exist_ok=True)
         
-        conn.commit()
-        conn.close()
+        migrate(self.get_connection())
+    
+    def _lookup_id(self, conn, table, name):
+        """Retorna o id de um termo/plataforma/região, criando se necessário"""
+        if name is None:
+            return None
+        key = (table, name)
+        pending = getattr(self._pending, 'ids', None)
+        lookup_id = self._lookup_ids.get(key)
+        if lookup_id is None and pending is not None:
+            lookup_id = pending.get(key)
+        if lookup_id is None:
+            conn.execute(f'INSERT OR IGNORE INTO {table} (name) VALUES (?)', (name,))
+            lookup_id = conn.execute(f'SELECT id FROM {table} WHERE name = ?', (name,)).fetchone()[0]
+            # Fora de transaction() não há commit a esperar, então o id não é guardado
+            if pending is not None:
+                pending[key] = lookup_id
+        return lookup_id
     
     def save_trend(self, term, platform, search_volume, region=None):
         """Salva uma tendência no banco"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
+        self.save_trends_bulk([(term, platform, search_volume, region)])
+    
+    def save_trends_bulk(self, rows, chunk_size=None, from_collection=False):
+        """Salva várias tendências (termo, plataforma, volume, região) em uma transação
         
-        cursor.execute('''
-            INSERT INTO trends (term, platform, search_volume, region, date_collected)
-            VALUES (?, ?, ?, ?, DATE('now'))
-        ''', (term, platform, search_volume, region))
+        from_collection marca as linhas vindas de um job de coleta (as únicas
+        usadas no snapshot de tendências do momento). Retorna a quantidade de
+        linhas inseridas.
+        """
+        chunk_size = chunk_size or Config.BULK_INSERT_CHUNK_SIZE
+        inserted = 0
         
-        conn.commit()
-        conn.close()
+        with self.transaction() as conn:
+            chunk = []
+            for row in rows:
+                chunk.append(tuple(row))
+                if len(chunk) >= chunk_size:
+                    inserted += self._insert_trends(conn, chunk, from_collection)
+                    chunk = []
+            if chunk:
+                inserted += self._insert_trends(conn, chunk, from_collection)
+        
+        return inserted
+    
+    def _insert_trends(self, conn, chunk, from_collection=False):
+        """Grava um bloco de tendências com executemany (upsert pela leitura do dia)"""
+        strategy = Config.TRENDS_UPSERT_STRATEGY
+        day = today()
+        points = [
+            (
+                self._lookup_id(conn, 'terms', term),
+                self._lookup_id(conn, 'platforms', platform),
+                self._lookup_id(conn, 'regions', region),
+                search_volume,
+                day
+            )
+            for term, platform, search_volume, region in chunk
+        ]
+        # Uma leitura que veio de coleta no dia continua marcada como tal
+        conn.executemany(f'''
+            INSERT INTO trend_points (term_id, platform_id, region_id, search_volume, day, from_collection)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT (term_id, platform_id, COALESCE(region_id, 0), day) DO UPDATE SET
+            {UPSERT_STRATEGIES[strategy]},
+            from_collection = MAX(from_collection, excluded.from_collection)
+        ''', [point + (int(from_collection),) for point in points])
+        
+        # Atualizar os agregados só dos termos afetados
+        refresh_daily_rollup(conn, {(point[0], point[1], point[4]) for point in points})
+        refresh_regional_matrix(conn, points, keep_max=strategy == 'max')
+        self._bump_data_version(conn)
+        return len(chunk)
+    
+    def _bump_data_version(self, conn):
+        """Marca que os dados de tendências mudaram (na mesma transação da gravação)"""
+        conn.execute('UPDATE data_version SET version = version + 1, updated_at = ? WHERE id = 1', (time.time(),))
+    
+    def get_data_version(self):
+        """Retorna (versão, timestamp da última gravação) dos dados de tendências"""
+        row = self.get_connection().execute('SELECT version, updated_at FROM data_version WHERE id = 1').fetchone()
+        return tuple(row) if row else (0, None)
     
     def get_trends(self, platform=None, limit=50):
         """Busca tendências do banco"""
@@ -65,34 +252,333 @@ class Database:
         cursor = conn.cursor()
         
         query = '''
-            SELECT term, platform, search_volume, region, date_collected
-            FROM trends
-            WHERE date_collected >= DATE('now', '-3 days')
+            SELECT te.name, pl.name, p.search_volume, r.name,
+                   DATE(p.day * 86400, 'unixepoch')
+            FROM trend_points p
+            JOIN terms te ON te.id = p.term_id
+            JOIN platforms pl ON pl.id = p.platform_id
+            LEFT JOIN regions r ON r.id = p.region_id
+            WHERE p.day >= ?
         '''
         
-        params = []
+        params = [today() - Config.DEFAULT_SEARCH_DAYS]
         if platform:
-            query += ' AND platform = ?'
+            query += ' AND p.platform_id = (SELECT id FROM platforms WHERE name = ?)'
             params.append(platform)
             
-        query += ' ORDER BY search_volume DESC LIMIT ?'
+        query += ' ORDER BY p.search_volume DESC LIMIT ?'
         params.append(limit)
         
         cursor.execute(query, params)
         results = cursor.fetchall()
-        conn.close()
         
         return results
     
-    def save_user_search(self, search_term):
-        """Salva pesquisa do usuário"""
+    def _ranking_query(self, platform=None, after=None):
+        """Monta a consulta do ranking ordenada por (volume, id) decrescentes"""
+        query = '''
+            SELECT te.name, pl.name, d.total_volume, NULL,
+                   DATE(d.day * 86400, 'unixepoch'), d.id
+            FROM trend_daily d
+            JOIN terms te ON te.id = d.term_id
+            JOIN platforms pl ON pl.id = d.platform_id
+            WHERE d.day >= ?
+        '''
+        
+        params = [today() - Config.DEFAULT_SEARCH_DAYS]
+        if platform:
+            query += ' AND d.platform_id = (SELECT id FROM platforms WHERE name = ?)'
+            params.append(platform)
+        
+        if after is not None:
+            # Paginação por chave: continua depois da última linha entregue
+            query += ' AND (d.total_volume < ? OR (d.total_volume = ? AND d.id < ?))'
+            params.extend([after[0], after[0], after[1]])
+        
+        query += ' ORDER BY d.total_volume DESC, d.id DESC'
+        return query, params
+    
+    def get_ranking(self, platform=None, limit=50, after=None):
+        """Busca o ranking a partir do agregado diário (termo, plataforma, dia)
+        
+        Retorna (termo, plataforma, volume total, região, data, id); a região
+        é None porque o agregado cobre o país inteiro. after=(volume, id)
+        retoma a listagem depois dessa linha.
+        """
+        query, params = self._ranking_query(platform, after)
+        query += ' LIMIT ?'
+        params.append(limit)
+        
+        return self.get_connection().execute(query, params).fetchall()
+    
+    def get_ranking_stats(self, platform=None):
+        """Calcula as estatísticas do ranking no próprio banco
+        
+        Retorna (totais, por_plataforma): totais = (termos distintos,
+        plataformas, volume total, regiões) e por_plataforma = lista de
+        (plataforma, termos, volume total).
+        """
         conn = self.get_connection()
-        cursor = conn.cursor()
+        since = today() - Config.DEFAULT_SEARCH_DAYS
+        
+        platform_filter = ''
+        params = [since]
+        if platform:
+            platform_filter = ' AND platform_id = (SELECT id FROM platforms WHERE name = ?)'
+            params.append(platform)
+        
+        terms, platforms, total_volume = conn.execute(f'''
+            SELECT COUNT(DISTINCT term_id), COUNT(DISTINCT platform_id), COALESCE(SUM(total_volume), 0)
+            FROM trend_daily
+            WHERE day >= ?{platform_filter}
+        ''', params).fetchone()
         
-        cursor.execute('''
-            INSERT INTO user_searches (search_term)
-            VALUES (?)
-        ''', (search_term,))
+        regions = conn.execute(f'''
+            SELECT COUNT(DISTINCT region_id)
+            FROM trend_points
+            WHERE day >= ?{platform_filter}
+        ''', params).fetchone()[0]
         
-        conn.commit()
-        conn.close()
\ No newline at end of file
+        by_platform = conn.execute(f'''
+            SELECT pl.name, COUNT(DISTINCT d.term_id), SUM(d.total_volume)
+            FROM trend_daily d
+            JOIN platforms pl ON pl.id = d.platform_id
+            WHERE d.day >= ?{platform_filter.replace('platform_id', 'd.platform_id')}
+            GROUP BY d.platform_id
+            ORDER BY SUM(d.total_volume) DESC
+        ''', params).fetchall()
+        
+        return (terms, platforms, total_volume, regions), by_platform
+    
+    def iter_ranking(self, platform=None, after=None, limit=None, batch_size=500):
+        """Percorre o ranking em blocos, sem carregar todas as linhas na memória"""
+        query, params = self._ranking_query(platform, after)
+        if limit is not None:
+            query += ' LIMIT ?'
+            params.append(limit)
+        
+        cursor = self.get_connection().execute(query, params)
+        try:
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield from rows
+        finally:
+            cursor.close()
+    
+    def get_regional_matrix(self, term):
+        """Busca a matriz estado × plataforma do dia mais recente de um termo
+        
+        Retorna (região, plataforma, volume, atualizado_em); região None traz
+        o volume nacional da plataforma (do agregado diário).
+        """
+        conn = self.get_connection()
+        return conn.execute('''
+            WITH target AS (
+                SELECT t.id AS term_id, MAX(m.day) AS day
+                FROM terms t
+                JOIN regional_matrix m ON m.term_id = t.id
+                WHERE t.name = ?
+            )
+            SELECT r.name, pl.name, m.volume, m.updated_at
+            FROM target
+            JOIN regional_matrix m ON m.term_id = target.term_id AND m.day = target.day
+            JOIN regions r ON r.id = m.region_id
+            JOIN platforms pl ON pl.id = m.platform_id
+            UNION ALL
+            SELECT NULL, pl.name, d.total_volume, NULL
+            FROM target
+            JOIN trend_daily d ON d.term_id = target.term_id AND d.day = target.day
+            JOIN platforms pl ON pl.id = d.platform_id
+        ''', (term,)).fetchall()
+    
+    def get_latest_snapshot(self):
+        """Busca a coleta mais recente de cada plataforma
+        
+        Retorna (termo, plataforma, volume, região) com a leitura mais nova
+        de cada termo/região no último dia coletado da plataforma; região
+        None indica o volume nacional. Só entram linhas gravadas por jobs de
+        coleta (não as de buscas de usuários ou do pré-aquecimento).
+        """
+        conn = self.get_connection()
+        return conn.execute('''
+            WITH latest AS (
+                SELECT platform_id, MAX(day) AS day
+                FROM trend_points
+                WHERE from_collection = 1
+                GROUP BY platform_id
+            ),
+            newest AS (
+                SELECT MAX(p.id) AS id
+                FROM trend_points p
+                JOIN latest l ON l.platform_id = p.platform_id AND l.day = p.day
+                WHERE p.from_collection = 1
+                GROUP BY p.term_id, p.platform_id, p.region_id
+            )
+            SELECT te.name, pl.name, p.search_volume, r.name
+            FROM newest n
+            JOIN trend_points p ON p.id = n.id
+            JOIN terms te ON te.id = p.term_id
+            JOIN platforms pl ON pl.id = p.platform_id
+            LEFT JOIN regions r ON r.id = p.region_id
+            ORDER BY p.id
+        ''').fetchall()
+    
+    def prune_trends(self, before_day, daily_before_day):
+        """Apaga leituras anteriores a before_day e agregados anteriores a daily_before_day
+        
+        Os dias apagados de trend_points continuam resumidos em trend_daily até
+        daily_before_day. Retorna as linhas apagadas por tabela.
+        """
+        with self.transaction() as conn:
+            deleted = {
+                'trend_points': conn.execute('DELETE FROM trend_points WHERE day < ?', (before_day,)).rowcount,
+                'regional_matrix': conn.execute('DELETE FROM regional_matrix WHERE day < ?', (before_day,)).rowcount,
+                'trend_daily': conn.execute('DELETE FROM trend_daily WHERE day < ?', (daily_before_day,)).rowcount
+            }
+            if any(deleted.values()):
+                self._bump_data_version(conn)
+        return deleted
+    
+    def incremental_vacuum(self, pages=0):
+        """Devolve ao sistema até pages páginas livres (0 = todas); retorna as páginas liberadas"""
+        conn = self.get_connection()
+        if conn.in_transaction:
+            conn.commit()
+        if conn.execute('PRAGMA auto_vacuum').fetchone()[0] != 2:
+            # auto_vacuum só muda após um VACUUM completo, feito uma única vez
+            conn.execute('PRAGMA auto_vacuum = INCREMENTAL')
+            conn.execute('VACUUM')
+        free_before = conn.execute('PRAGMA freelist_count').fetchone()[0]
+        conn.execute(f'PRAGMA incremental_vacuum({int(pages)})').fetchall()
+        return free_before - conn.execute('PRAGMA freelist_count').fetchone()[0]
+    
+    def suggest_terms(self, prefix, limit=10):
+        """Termos conhecidos que começam com as palavras digitadas
+        
+        Retorna [(termo, maior volume diário ou None, vezes pesquisado)], com os
+        termos que já têm dados coletados primeiro.
+        """
+        words = re.findall(r'\w+', prefix)
+        if not words:
+            return []
+        # Cada palavra vira um prefixo entre aspas (sem sintaxe FTS do usuário)
+        query = ' '.join(f'"{word}"*' for word in words)
+        
+        conn = self.get_connection()
+        return conn.execute('''
+            SELECT te.name,
+                   (SELECT MAX(d.total_volume) FROM trend_daily d WHERE d.term_id = te.id) AS volume,
+                   (SELECT COUNT(*) FROM user_searches s WHERE s.search_term = te.name) AS searches
+            FROM term_search
+            JOIN terms te ON te.id = term_search.rowid
+            WHERE term_search MATCH ?
+            ORDER BY volume IS NULL, volume DESC, searches DESC, term_search.rank
+            LIMIT ?
+        ''', (query, limit)).fetchall()
+    
+    def get_popular_searches(self, since, limit=20):
+        """Termos mais pesquisados desde o timestamp since (mais frequentes e recentes primeiro)
+        
+        Retorna [(termo, pesquisas, última pesquisa)].
+        """
+        conn = self.get_connection()
+        return conn.execute('''
+            SELECT search_term, COUNT(*) AS searches, MAX(search_date) AS last_search
+            FROM user_searches
+            WHERE search_date >= DATETIME(?, 'unixepoch')
+            GROUP BY search_term
+            ORDER BY searches DESC, last_search DESC
+            LIMIT ?
+        ''', (since, limit)).fetchall()
+    
+    def iter_export(self, table, start_day=None, end_day=None, platform=None, region=None, batch_size=5000):
+        """Percorre trends ou user_searches em blocos de até batch_size linhas (exportação)
+        
+        Os dias são inclusivos; as colunas de cada tabela estão em EXPORT_COLUMNS.
+        region='Brasil' seleciona as leituras nacionais (sem estado). Filtros
+        inválidos geram ValueError já na chamada, antes da primeira leitura.
+        """
+        conditions = []
+        params = []
+        if table == 'trends':
+            query = '''
+                SELECT te.name, pl.name, r.name, p.search_volume,
+                       DATE(p.day * 86400, 'unixepoch'), p.created_at
+                FROM trend_points p
+                JOIN terms te ON te.id = p.term_id
+                JOIN platforms pl ON pl.id = p.platform_id
+                LEFT JOIN regions r ON r.id = p.region_id
+            '''
+            if start_day is not None:
+                conditions.append('p.day >= ?')
+                params.append(start_day)
+            if end_day is not None:
+                conditions.append('p.day <= ?')
+                params.append(end_day)
+            if platform:
+                conditions.append('p.platform_id = (SELECT id FROM platforms WHERE name = ?)')
+                params.append(platform)
+            if region == 'Brasil':
+                conditions.append('p.region_id IS NULL')
+            elif region:
+                conditions.append('p.region_id = (SELECT id FROM regions WHERE name = ?)')
+                params.append(region)
+            # Ordem dos índices por dia: sem ordenação em memória
+            order = ' ORDER BY p.day'
+        elif table == 'user_searches':
+            if platform or region:
+                raise ValueError('user_searches não tem plataforma nem região')
+            query = 'SELECT search_term, search_date FROM user_searches'
+            if start_day is not None:
+                conditions.append("search_date >= DATE(? * 86400, 'unixepoch')")
+                params.append(start_day)
+            if end_day is not None:
+                conditions.append("search_date < DATE((? + 1) * 86400, 'unixepoch')")
+                params.append(end_day)
+            order = ' ORDER BY search_date'
+        else:
+            raise ValueError(f'Tabela desconhecida: {table}')
+        
+        if conditions:
+            query += ' WHERE ' + ' AND '.join(conditions)
+        return self._iter_batches(query + order, params, batch_size)
+    
+    def _iter_batches(self, query, params, batch_size):
+        cursor = self.get_connection().execute(query, params)
+        try:
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield rows
+        finally:
+            cursor.close()
+    
+    def acquire_lock(self, name, owner, ttl):
+        """Tenta obter um lock nomeado por ttl segundos (entre processos)"""
+        now = time.time()
+        with self.transaction() as conn:
+            conn.execute('''
+                INSERT INTO job_locks (name, owner, expires_at) VALUES (?, ?, ?)
+                ON CONFLICT (name) DO UPDATE SET
+                    owner = excluded.owner,
+                    expires_at = excluded.expires_at
+                WHERE job_locks.expires_at < ? OR job_locks.owner = excluded.owner
+            ''', (name, owner, now + ttl, now))
+            row = conn.execute('SELECT owner FROM job_locks WHERE name = ?', (name,)).fetchone()
+        return row is not None and row[0] == owner
+    
+    def release_lock(self, name, owner):
+        """Libera um lock obtido com acquire_lock"""
+        with self.transaction() as conn:
+            conn.execute('DELETE FROM job_locks WHERE name = ? AND owner = ?', (name, owner))
+    
+    def save_user_search(self, search_term):
+        """Salva pesquisa do usuário"""
+        with self.transaction() as conn:
+            conn.execute('''
+                INSERT INTO user_searches (search_term)
+                VALUES (?)
+            ''', (search_term,))
@@ -0,0 +1,444 @@
+"""Migrações de esquema do banco SQLite
+
+Cada migração roda uma única vez, em ordem, e a versão aplicada fica
+registrada em PRAGMA user_version.
+"""
+
+import sys
+from database.rollups import refresh_daily_rollup, refresh_regional_matrix
+from database.timeseries import rebuild_blocks
+
+# julianday('1970-01-01'): converte datas em dias desde a época Unix
+UNIX_EPOCH_JULIAN_DAY = 2440587.5
+
+
+def _create_base_tables(conn):
+    """Cria as tabelas originais de tendências e pesquisas"""
+    # Tabela de tendências
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS trends (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            term TEXT NOT NULL,
+            platform TEXT NOT NULL,
+            search_volume INTEGER,
+            region TEXT,
+            date_collected DATE,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+    # Tabela de pesquisas do usuário
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS user_searches (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            search_term TEXT NOT NULL,
+            search_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+
+def _normalize_trends(conn):
+    """Normaliza termo/plataforma/região em tabelas de apoio e indexa por dia
+
+    A tabela trends vira uma view com as mesmas colunas de antes, e um
+    trigger INSTEAD OF mantém os INSERTs antigos funcionando.
+    """
+    for table in ('terms', 'platforms', 'regions'):
+        conn.execute(f'''
+            CREATE TABLE {table} (
+                id INTEGER PRIMARY KEY,
+                name TEXT NOT NULL UNIQUE
+            )
+        ''')
+
+    # day = dias desde 1970-01-01 (inteiro, amigável a índices)
+    conn.execute('''
+        CREATE TABLE trend_points (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            term_id INTEGER NOT NULL REFERENCES terms (id),
+            platform_id INTEGER NOT NULL REFERENCES platforms (id),
+            region_id INTEGER REFERENCES regions (id),
+            search_volume INTEGER,
+            day INTEGER NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+    conn.execute('INSERT OR IGNORE INTO terms (name) SELECT DISTINCT term FROM trends')
+    conn.execute('INSERT OR IGNORE INTO platforms (name) SELECT DISTINCT platform FROM trends')
+    conn.execute('INSERT OR IGNORE INTO regions (name) SELECT DISTINCT region FROM trends WHERE region IS NOT NULL')
+    conn.execute(f'''
+        INSERT INTO trend_points (id, term_id, platform_id, region_id, search_volume, day, created_at)
+        SELECT t.id, te.id, pl.id, r.id, t.search_volume,
+               CAST(julianday(COALESCE(t.date_collected, DATE(t.created_at), DATE('now'))) - {UNIX_EPOCH_JULIAN_DAY} AS INTEGER),
+               t.created_at
+        FROM trends t
+        JOIN terms te ON te.name = t.term
+        JOIN platforms pl ON pl.name = t.platform
+        LEFT JOIN regions r ON r.name = t.region
+    ''')
+    conn.execute('DROP TABLE trends')
+
+    conn.execute('''
+        CREATE INDEX idx_trend_points_day_platform_volume
+        ON trend_points (day, platform_id, search_volume)
+    ''')
+    conn.execute('''
+        CREATE INDEX idx_trend_points_platform_day_volume
+        ON trend_points (platform_id, day, search_volume)
+    ''')
+
+    conn.execute('''
+        CREATE VIEW trends AS
+        SELECT p.id,
+               te.name AS term,
+               pl.name AS platform,
+               p.search_volume,
+               r.name AS region,
+               DATE(p.day * 86400, 'unixepoch') AS date_collected,
+               p.created_at
+        FROM trend_points p
+        JOIN terms te ON te.id = p.term_id
+        JOIN platforms pl ON pl.id = p.platform_id
+        LEFT JOIN regions r ON r.id = p.region_id
+    ''')
+    conn.execute(f'''
+        CREATE TRIGGER trends_insert INSTEAD OF INSERT ON trends
+        BEGIN
+            INSERT OR IGNORE INTO terms (name) VALUES (NEW.term);
+            INSERT OR IGNORE INTO platforms (name) VALUES (NEW.platform);
+            INSERT OR IGNORE INTO regions (name) SELECT NEW.region WHERE NEW.region IS NOT NULL;
+            INSERT INTO trend_points (term_id, platform_id, region_id, search_volume, day)
+            VALUES (
+                (SELECT id FROM terms WHERE name = NEW.term),
+                (SELECT id FROM platforms WHERE name = NEW.platform),
+                (SELECT id FROM regions WHERE name = NEW.region),
+                NEW.search_volume,
+                CAST(julianday(COALESCE(NEW.date_collected, DATE('now'))) - {UNIX_EPOCH_JULIAN_DAY} AS INTEGER)
+            );
+        END
+    ''')
+
+
+def _create_job_locks(conn):
+    """Cria a tabela de locks usada pelos jobs em segundo plano"""
+    conn.execute('''
+        CREATE TABLE job_locks (
+            name TEXT PRIMARY KEY,
+            owner TEXT NOT NULL,
+            expires_at REAL NOT NULL
+        )
+    ''')
+
+
+def _create_daily_rollup(conn):
+    """Cria a tabela de agregados diários por termo/plataforma e a preenche"""
+    conn.execute('''
+        CREATE TABLE trend_daily (
+            id INTEGER PRIMARY KEY,
+            term_id INTEGER NOT NULL REFERENCES terms (id),
+            platform_id INTEGER NOT NULL REFERENCES platforms (id),
+            day INTEGER NOT NULL,
+            total_volume INTEGER NOT NULL DEFAULT 0,
+            peak_volume INTEGER NOT NULL DEFAULT 0,
+            region_count INTEGER NOT NULL DEFAULT 0,
+            rank INTEGER,
+            UNIQUE (term_id, platform_id, day)
+        )
+    ''')
+    conn.execute('''
+        CREATE INDEX idx_trend_daily_day_volume
+        ON trend_daily (day, total_volume)
+    ''')
+    conn.execute('''
+        CREATE INDEX idx_trend_daily_platform_day_volume
+        ON trend_daily (platform_id, day, total_volume)
+    ''')
+    # Recalcular uma chave do agregado sem varrer o histórico
+    conn.execute('''
+        CREATE INDEX idx_trend_points_term_platform_day
+        ON trend_points (term_id, platform_id, day, region_id)
+    ''')
+    refresh_daily_rollup(conn)
+
+
+def _create_regional_matrix(conn):
+    """Cria a matriz estado × plataforma por termo e dia e a preenche"""
+    conn.execute('''
+        CREATE INDEX idx_trend_points_term_region_platform
+        ON trend_points (term_id, region_id, platform_id, day)
+    ''')
+    conn.execute('''
+        CREATE TABLE regional_matrix (
+            term_id INTEGER NOT NULL REFERENCES terms (id),
+            day INTEGER NOT NULL,
+            region_id INTEGER NOT NULL REFERENCES regions (id),
+            platform_id INTEGER NOT NULL REFERENCES platforms (id),
+            volume INTEGER,
+            updated_at REAL NOT NULL,
+            PRIMARY KEY (term_id, day, region_id, platform_id)
+        ) WITHOUT ROWID
+    ''')
+    refresh_regional_matrix(conn)
+
+
+def _create_series_blocks(conn):
+    """Cria a tabela de blocos das séries temporais (database/timeseries.py)"""
+    conn.execute('''
+        CREATE TABLE series_blocks (
+            term_id INTEGER NOT NULL REFERENCES terms (id),
+            platform_id INTEGER NOT NULL REFERENCES platforms (id),
+            resolution TEXT NOT NULL,
+            block_start INTEGER NOT NULL,
+            timestamps BLOB NOT NULL,
+            "values" BLOB NOT NULL,
+            point_count INTEGER NOT NULL,
+            PRIMARY KEY (term_id, platform_id, resolution, block_start)
+        ) WITHOUT ROWID
+    ''')
+    # Downsampling e retenção varrem os blocos por resolução e idade
+    conn.execute('''
+        CREATE INDEX idx_series_blocks_resolution_start
+        ON series_blocks (resolution, block_start)
+    ''')
+
+
+def _deduplicate_trend_points(conn):
+    """Mantém uma leitura por (termo, plataforma, região, dia) e cria a chave de upsert"""
+    # A leitura mais recente prevalece, como nos agregados
+    conn.execute('''
+        DELETE FROM trend_points
+        WHERE id NOT IN (
+            SELECT MAX(id) FROM trend_points
+            GROUP BY term_id, platform_id, COALESCE(region_id, 0), day
+        )
+    ''')
+    conn.execute('''
+        CREATE UNIQUE INDEX idx_trend_points_unique_day
+        ON trend_points (term_id, platform_id, COALESCE(region_id, 0), day)
+    ''')
+    
+    # INSERTs antigos na view também passam a atualizar a leitura do dia
+    conn.execute('DROP TRIGGER trends_insert')
+    conn.execute(f'''
+        CREATE TRIGGER trends_insert INSTEAD OF INSERT ON trends
+        BEGIN
+            INSERT OR IGNORE INTO terms (name) VALUES (NEW.term);
+            INSERT OR IGNORE INTO platforms (name) VALUES (NEW.platform);
+            INSERT OR IGNORE INTO regions (name) SELECT NEW.region WHERE NEW.region IS NOT NULL;
+            INSERT INTO trend_points (term_id, platform_id, region_id, search_volume, day)
+            VALUES (
+                (SELECT id FROM terms WHERE name = NEW.term),
+                (SELECT id FROM platforms WHERE name = NEW.platform),
+                (SELECT id FROM regions WHERE name = NEW.region),
+                NEW.search_volume,
+                CAST(julianday(COALESCE(NEW.date_collected, DATE('now'))) - {UNIX_EPOCH_JULIAN_DAY} AS INTEGER)
+            )
+            ON CONFLICT (term_id, platform_id, COALESCE(region_id, 0), day) DO UPDATE SET
+                search_volume = excluded.search_volume,
+                created_at = CURRENT_TIMESTAMP;
+        END
+    ''')
+
+
+def _create_term_search(conn):
+    """Cria o índice FTS5 dos termos conhecidos (coletados e pesquisados)"""
+    # Pesquisas dos usuários também viram termos conhecidos
+    conn.execute('INSERT OR IGNORE INTO terms (name) SELECT DISTINCT search_term FROM user_searches')
+    conn.execute('''
+        CREATE TRIGGER user_searches_term AFTER INSERT ON user_searches
+        BEGIN
+            INSERT OR IGNORE INTO terms (name) VALUES (NEW.search_term);
+        END
+    ''')
+    conn.execute('''
+        CREATE INDEX idx_user_searches_term
+        ON user_searches (search_term)
+    ''')
+    
+    # remove_diacritics: "promocao" encontra "promoção"
+    conn.execute('''
+        CREATE VIRTUAL TABLE term_search USING fts5(
+            name,
+            content = 'terms',
+            content_rowid = 'id',
+            tokenize = 'unicode61 remove_diacritics 2',
+            prefix = '2 3'
+        )
+    ''')
+    conn.execute('''
+        CREATE TRIGGER terms_search_insert AFTER INSERT ON terms
+        BEGIN
+            INSERT INTO term_search (rowid, name) VALUES (NEW.id, NEW.name);
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER terms_search_delete AFTER DELETE ON terms
+        BEGIN
+            INSERT INTO term_search (term_search, rowid, name) VALUES ('delete', OLD.id, OLD.name);
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER terms_search_update AFTER UPDATE OF name ON terms
+        BEGIN
+            INSERT INTO term_search (term_search, rowid, name) VALUES ('delete', OLD.id, OLD.name);
+            INSERT INTO term_search (rowid, name) VALUES (NEW.id, NEW.name);
+        END
+    ''')
+    conn.execute("INSERT INTO term_search (term_search) VALUES ('rebuild')")
+
+
+def _index_user_search_dates(conn):
+    """Indexa as pesquisas por data (janela do pré-aquecimento do cache)"""
+    conn.execute('''
+        CREATE INDEX idx_user_searches_date
+        ON user_searches (search_date, search_term)
+    ''')
+
+
+def _create_data_version(conn):
+    """Versão dos dados de tendências, incrementada a cada gravação (ETags e cache de páginas)"""
+    conn.execute('''
+        CREATE TABLE data_version (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            version INTEGER NOT NULL,
+            updated_at REAL
+        )
+    ''')
+    conn.execute('''
+        INSERT INTO data_version (id, version, updated_at)
+        SELECT 1, 1, CAST(STRFTIME('%s', MAX(created_at)) AS REAL) FROM trend_points
+    ''')
+
+
+def _align_day_blocks(conn):
+    """Blocos diários de 4 semanas alinhados às semanas (antes eram de 30 dias)"""
+    rebuild_blocks(conn, 'day')
+
+
+def _mark_collected_points(conn):
+    """Marca as leituras gravadas por jobs de coleta (snapshot de tendências do momento)"""
+    conn.execute('ALTER TABLE trend_points ADD COLUMN from_collection INTEGER NOT NULL DEFAULT 0')
+    # Sem a origem registrada, termos que nunca foram pesquisados vêm das coletas
+    conn.execute('''
+        UPDATE trend_points SET from_collection = 1
+        WHERE term_id NOT IN (
+            SELECT te.id FROM terms te JOIN user_searches u ON u.search_term = te.name
+        )
+    ''')
+
+
+def _restamp_regional_matrix(conn):
+    """Refaz a matriz regional com a data real de cada leitura
+
+    A reconstrução da migração 5 marcava todo o histórico como atualizado
+    no momento da migração, e dados antigos pareciam recentes.
+    """
+    refresh_regional_matrix(conn)
+
+
+def _maintain_rollups_on_view_insert(conn):
+    """INSERTs na view trends passam a atualizar trend_daily, a matriz regional e a versão dos dados
+
+    O gatilho fica fixo no banco, então usa sempre a estratégia 'latest'
+    (a nova leitura substitui a do dia), independente de TRENDS_UPSERT_STRATEGY.
+    """
+    term = '(SELECT id FROM terms WHERE name = NEW.term)'
+    platform = '(SELECT id FROM platforms WHERE name = NEW.platform)'
+    region = '(SELECT id FROM regions WHERE name = NEW.region)'
+    day = f"CAST(julianday(COALESCE(NEW.date_collected, DATE('now'))) - {UNIX_EPOCH_JULIAN_DAY} AS INTEGER)"
+    key = f'p.term_id = {term} AND p.platform_id = {platform} AND p.day = {day}'
+    conn.execute('DROP TRIGGER trends_insert')
+    conn.execute(f'''
+        CREATE TRIGGER trends_insert INSTEAD OF INSERT ON trends
+        BEGIN
+            INSERT OR IGNORE INTO terms (name) VALUES (NEW.term);
+            INSERT OR IGNORE INTO platforms (name) VALUES (NEW.platform);
+            INSERT OR IGNORE INTO regions (name) SELECT NEW.region WHERE NEW.region IS NOT NULL;
+            INSERT INTO trend_points (term_id, platform_id, region_id, search_volume, day)
+            VALUES ({term}, {platform}, {region}, NEW.search_volume, {day})
+            ON CONFLICT (term_id, platform_id, COALESCE(region_id, 0), day) DO UPDATE SET
+                search_volume = excluded.search_volume,
+                created_at = CURRENT_TIMESTAMP;
+
+            -- Mesmo cálculo de refresh_daily_rollup, só para a chave inserida
+            INSERT INTO trend_daily (term_id, platform_id, day, total_volume, peak_volume, region_count)
+            SELECT {term}, {platform}, {day},
+                   COALESCE(
+                       (SELECT p.search_volume FROM trend_points p WHERE {key} AND p.region_id IS NULL),
+                       (SELECT SUM(p.search_volume) FROM trend_points p WHERE {key} AND p.region_id IS NOT NULL),
+                       0
+                   ),
+                   (SELECT COALESCE(MAX(p.search_volume), 0) FROM trend_points p WHERE {key}),
+                   (SELECT COUNT(DISTINCT p.region_id) FROM trend_points p WHERE {key})
+            WHERE true
+            ON CONFLICT (term_id, platform_id, day) DO UPDATE SET
+                total_volume = excluded.total_volume,
+                peak_volume = excluded.peak_volume,
+                region_count = excluded.region_count;
+            UPDATE trend_daily
+            SET rank = (
+                SELECT COUNT(*) + 1 FROM trend_daily d
+                WHERE d.platform_id = trend_daily.platform_id AND d.day = trend_daily.day
+                  AND d.total_volume > trend_daily.total_volume
+            )
+            WHERE platform_id = {platform} AND day = {day};
+
+            INSERT INTO regional_matrix (term_id, day, region_id, platform_id, volume, updated_at)
+            SELECT {term}, {day}, {region}, {platform}, NEW.search_volume, CAST(STRFTIME('%s', 'now') AS REAL)
+            WHERE NEW.region IS NOT NULL
+            ON CONFLICT (term_id, day, region_id, platform_id) DO UPDATE SET
+                volume = excluded.volume,
+                updated_at = excluded.updated_at;
+
+            UPDATE data_version SET version = version + 1, updated_at = CAST(STRFTIME('%s', 'now') AS REAL)
+            WHERE id = 1;
+        END
+    ''')
+
+
+# (versão, descrição, função)
+MIGRATIONS = [
+    (1, 'Tabelas base', _create_base_tables),
+    (2, 'Normalização e índices de tendências', _normalize_trends),
+    (3, 'Locks de jobs em segundo plano', _create_job_locks),
+    (4, 'Agregado diário de tendências', _create_daily_rollup),
+    (5, 'Matriz regional por termo', _create_regional_matrix),
+    (6, 'Séries temporais em blocos', _create_series_blocks),
+    (7, 'Leitura única por dia em trend_points', _deduplicate_trend_points),
+    (8, 'Índice de busca textual de termos', _create_term_search),
+    (9, 'Índice de pesquisas por data', _index_user_search_dates),
+    (10, 'Versão dos dados de tendências', _create_data_version),
+    (11, 'Blocos diários alinhados às semanas', _align_day_blocks),
+    (12, 'Origem das leituras de tendências', _mark_collected_points),
+    (13, 'Data real das células da matriz regional', _restamp_regional_matrix),
+    (14, 'Agregados atualizados por INSERTs na view trends', _maintain_rollups_on_view_insert),
+]
+
+
+def get_version(conn):
+    """Retorna a versão de esquema aplicada"""
+    return conn.execute('PRAGMA user_version').fetchone()[0]
+
+
+def migrate(conn):
+    """Aplica as migrações pendentes, cada uma em sua própria transação"""
+    current = get_version(conn)
+    for version, description, func in MIGRATIONS:
+        if version <= current:
+            continue
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            # Outro processo pode ter migrado enquanto aguardávamos o lock
+            if get_version(conn) >= version:
+                conn.rollback()
+                continue
+            func(conn)
+            conn.execute(f'PRAGMA user_version = {version}')
+            conn.commit()
+            # Na saída de erro: a saída padrão pode ser um arquivo exportado (export.py)
+            print(f"Migração {version} aplicada: {description}", file=sys.stderr)
+        except Exception:
+            conn.rollback()
+            raise
+    return get_version(conn)
@@ -0,0 +1,128 @@
+"""Agregações incrementais das tendências
+
+trend_daily: as chaves afetadas por uma escrita são colocadas na tabela
+temporária rollup_keys e só esses (termo, plataforma, dia) são recalculados.
+regional_matrix: matriz estado × plataforma por termo e dia, com a leitura
+mais recente de cada célula.
+"""
+
+import time
+
+
+def _create_keys_table(conn):
+    conn.execute('''
+        CREATE TEMP TABLE IF NOT EXISTS rollup_keys (
+            term_id INTEGER NOT NULL,
+            platform_id INTEGER NOT NULL,
+            day INTEGER NOT NULL,
+            PRIMARY KEY (term_id, platform_id, day)
+        ) WITHOUT ROWID
+    ''')
+    conn.execute('DELETE FROM rollup_keys')
+
+
+def refresh_daily_rollup(conn, keys=None):
+    """Recalcula trend_daily para as chaves (term_id, platform_id, day)
+
+    Sem chaves, recalcula todo o histórico.
+    """
+    _create_keys_table(conn)
+    if keys is None:
+        conn.execute('''
+            INSERT INTO rollup_keys (term_id, platform_id, day)
+            SELECT DISTINCT term_id, platform_id, day FROM trend_points
+        ''')
+    else:
+        conn.executemany(
+            'INSERT OR IGNORE INTO rollup_keys (term_id, platform_id, day) VALUES (?, ?, ?)',
+            keys
+        )
+
+    # Total: leitura nacional mais recente do dia, ou a soma das leituras
+    # regionais mais recentes quando não há volume nacional
+    conn.execute('''
+        INSERT INTO trend_daily (term_id, platform_id, day, total_volume, peak_volume, region_count)
+        SELECT k.term_id, k.platform_id, k.day,
+               COALESCE(
+                   (SELECT p.search_volume FROM trend_points p
+                    WHERE p.term_id = k.term_id AND p.platform_id = k.platform_id
+                      AND p.day = k.day AND p.region_id IS NULL
+                    ORDER BY p.id DESC LIMIT 1),
+                   (SELECT SUM(p.search_volume) FROM trend_points p
+                    WHERE p.id IN (
+                        SELECT MAX(id) FROM trend_points
+                        WHERE term_id = k.term_id AND platform_id = k.platform_id
+                          AND day = k.day AND region_id IS NOT NULL
+                        GROUP BY region_id
+                    )),
+                   0
+               ),
+               (SELECT COALESCE(MAX(p.search_volume), 0) FROM trend_points p
+                WHERE p.term_id = k.term_id AND p.platform_id = k.platform_id AND p.day = k.day),
+               (SELECT COUNT(DISTINCT p.region_id) FROM trend_points p
+                WHERE p.term_id = k.term_id AND p.platform_id = k.platform_id AND p.day = k.day)
+        FROM rollup_keys k
+        WHERE true
+        ON CONFLICT (term_id, platform_id, day) DO UPDATE SET
+            total_volume = excluded.total_volume,
+            peak_volume = excluded.peak_volume,
+            region_count = excluded.region_count
+    ''')
+
+    # Posição no ranking de cada plataforma/dia afetado
+    conn.execute('''
+        CREATE TEMP TABLE IF NOT EXISTS rollup_ranks (
+            id INTEGER PRIMARY KEY,
+            position INTEGER NOT NULL
+        )
+    ''')
+    conn.execute('DELETE FROM rollup_ranks')
+    conn.execute('''
+        INSERT INTO rollup_ranks (id, position)
+        SELECT id, RANK() OVER (PARTITION BY platform_id, day ORDER BY total_volume DESC)
+        FROM trend_daily
+        WHERE (platform_id, day) IN (SELECT platform_id, day FROM rollup_keys)
+    ''')
+    conn.execute('''
+        UPDATE trend_daily
+        SET rank = (SELECT position FROM rollup_ranks WHERE rollup_ranks.id = trend_daily.id)
+        WHERE id IN (SELECT id FROM rollup_ranks)
+    ''')
+    conn.execute('DELETE FROM rollup_keys')
+    conn.execute('DELETE FROM rollup_ranks')
+
+
+def refresh_regional_matrix(conn, points=None, keep_max=False):
+    """Atualiza a matriz regional com pontos (term_id, platform_id, region_id, volume, day)
+
+    Sem pontos, reconstrói a matriz a partir de todo o histórico, com
+    updated_at igual ao momento da leitura (e não ao da reconstrução). Com
+    keep_max, cada célula guarda o maior volume do dia em vez do último.
+    """
+    now = time.time()
+    if points is None:
+        conn.execute('''
+            INSERT OR REPLACE INTO regional_matrix (term_id, day, region_id, platform_id, volume, updated_at)
+            SELECT p.term_id, p.day, p.region_id, p.platform_id, p.search_volume,
+                   CAST(STRFTIME('%s', p.created_at) AS REAL)
+            FROM trend_points p
+            WHERE p.id IN (
+                SELECT MAX(id) FROM trend_points
+                WHERE region_id IS NOT NULL
+                GROUP BY term_id, day, region_id, platform_id
+            )
+        ''')
+        return
+
+    volume = 'MAX(volume, excluded.volume)' if keep_max else 'excluded.volume'
+    conn.executemany(f'''
+        INSERT INTO regional_matrix (term_id, day, region_id, platform_id, volume, updated_at)
+        VALUES (?, ?, ?, ?, ?, ?)
+        ON CONFLICT (term_id, day, region_id, platform_id) DO UPDATE SET
+            volume = {volume},
+            updated_at = excluded.updated_at
+    ''', [
+        (term_id, day, region_id, platform_id, volume, now)
+        for term_id, platform_id, region_id, volume, day in points
+        if region_id is not None
+    ])
@@ -0,0 +1,194 @@
+"""Armazenamento compacto de séries temporais de volume por termo/plataforma
+
+Os pontos ficam em blocos de arrays binários (timestamps int64 e valores
+float64), um bloco por (termo, plataforma, resolução, início do bloco).
+Com o tempo os pontos horários viram médias diárias, as diárias viram
+semanais, e as semanais mais antigas que a retenção são apagadas.
+"""
+
+import time
+from array import array
+from config.config import Config
+
+HOUR = 3600
+DAY = 24 * HOUR
+WEEK = 7 * DAY
+
+# Tamanho de cada ponto e de cada bloco, por resolução. Cada bloco é múltiplo
+# do passo da resolução seguinte (e alinhado a ele): uma semana nunca fica
+# dividida entre dois blocos diários
+RESOLUTIONS = {
+    'hour': {'step': HOUR, 'block': DAY},
+    'day': {'step': DAY, 'block': 4 * WEEK},
+    'week': {'step': WEEK, 'block': 52 * WEEK},
+}
+ORDER = ['hour', 'day', 'week']
+
+
+def _bucket(timestamp, resolution):
+    step = RESOLUTIONS[resolution]['step']
+    return int(timestamp) // step * step
+
+
+def _block_start(timestamp, resolution):
+    block = RESOLUTIONS[resolution]['block']
+    return int(timestamp) // block * block
+
+
+def _pack(points):
+    """Converte {timestamp: valor} em (timestamps, valores) binários"""
+    timestamps = array('q', sorted(points))
+    values = array('d', (points[timestamp] for timestamp in timestamps))
+    return timestamps.tobytes(), values.tobytes()
+
+
+def _unpack(timestamps_blob, values_blob):
+    timestamps = array('q')
+    timestamps.frombytes(timestamps_blob)
+    values = array('d')
+    values.frombytes(values_blob)
+    return dict(zip(timestamps, values))
+
+
+def _average(points, resolution):
+    """Agrupa {timestamp: valor} em médias na resolução informada"""
+    buckets = {}
+    for timestamp, value in points.items():
+        buckets.setdefault(_bucket(timestamp, resolution), []).append(value)
+    return {timestamp: sum(values) / len(values) for timestamp, values in buckets.items()}
+
+
+class TimeSeriesStore:
+    """Séries temporais em blocos com downsampling e retenção"""
+
+    def __init__(self, db):
+        self.db = db
+
+    def _read_block(self, conn, term_id, platform_id, resolution, block_start):
+        row = conn.execute('''
+            SELECT timestamps, "values" FROM series_blocks
+            WHERE term_id = ? AND platform_id = ? AND resolution = ? AND block_start = ?
+        ''', (term_id, platform_id, resolution, block_start)).fetchone()
+        return _unpack(*row) if row else {}
+
+    def _write_block(self, conn, term_id, platform_id, resolution, block_start, points):
+        timestamps, values = _pack(points)
+        conn.execute('''
+            INSERT OR REPLACE INTO series_blocks
+                (term_id, platform_id, resolution, block_start, timestamps, "values", point_count)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', (term_id, platform_id, resolution, block_start, timestamps, values, len(points)))
+
+    def _merge(self, conn, term_id, platform_id, resolution, points):
+        """Mescla pontos já na resolução informada (o ponto novo prevalece)"""
+        blocks = {}
+        for timestamp, value in points.items():
+            blocks.setdefault(_block_start(timestamp, resolution), {})[timestamp] = value
+        for block_start, block_points in blocks.items():
+            merged = self._read_block(conn, term_id, platform_id, resolution, block_start)
+            merged.update(block_points)
+            self._write_block(conn, term_id, platform_id, resolution, block_start, merged)
+
+    def append(self, series):
+        """Grava séries {(termo, plataforma): [(timestamp, valor), ...]} em pontos horários"""
+        with self.db.transaction() as conn:
+            for (term, platform), points in series.items():
+                if not points:
+                    continue
+                term_id = self.db._lookup_id(conn, 'terms', term)
+                platform_id = self.db._lookup_id(conn, 'platforms', platform)
+                hourly = _average(dict(points), 'hour')
+                self._merge(conn, term_id, platform_id, 'hour', hourly)
+
+    def get_range(self, term, platform, start=None, end=None, resolution=None):
+        """Retorna [(timestamp, valor)] do período, opcionalmente agregados na resolução"""
+        end = time.time() if end is None else end
+        start = 0 if start is None else start
+        conn = self.db.get_connection()
+
+        # Só os blocos que cobrem o período são lidos
+        rows = conn.execute('''
+            SELECT b.resolution, b.timestamps, b."values"
+            FROM series_blocks b
+            JOIN terms te ON te.id = b.term_id
+            JOIN platforms pl ON pl.id = b.platform_id
+            WHERE te.name = ? AND pl.name = ?
+              AND b.block_start <= ?
+              AND b.block_start + CASE b.resolution
+                    WHEN 'hour' THEN ? WHEN 'day' THEN ? ELSE ? END > ?
+        ''', (term, platform, end, RESOLUTIONS['hour']['block'], RESOLUTIONS['day']['block'],
+              RESOLUTIONS['week']['block'], start)).fetchall()
+
+        # Cada ponto pesa o intervalo que representa (um ponto diário vale 24 horárias)
+        points = {}
+        for block_resolution, timestamps_blob, values_blob in rows:
+            weight = RESOLUTIONS[block_resolution]['step']
+            for timestamp, value in _unpack(timestamps_blob, values_blob).items():
+                if start <= timestamp <= end:
+                    points[timestamp] = (value, weight)
+
+        if not resolution:
+            return sorted((timestamp, value) for timestamp, (value, weight) in points.items())
+
+        # Média ponderada por intervalo agregado, mesmo com pontos de blocos vizinhos
+        buckets = {}
+        for timestamp, (value, weight) in points.items():
+            total = buckets.setdefault(_bucket(timestamp, resolution), [0.0, 0])
+            total[0] += value * weight
+            total[1] += weight
+        return sorted((timestamp, weighted / weight) for timestamp, (weighted, weight) in buckets.items())
+
+    def _downsample(self, conn, source, target, older_than):
+        """Move blocos de source mais antigos que older_than para médias em target"""
+        rows = conn.execute('''
+            SELECT term_id, platform_id, block_start, timestamps, "values"
+            FROM series_blocks
+            WHERE resolution = ? AND block_start + ? <= ?
+        ''', (source, RESOLUTIONS[source]['block'], older_than)).fetchall()
+
+        for term_id, platform_id, block_start, timestamps_blob, values_blob in rows:
+            averaged = _average(_unpack(timestamps_blob, values_blob), target)
+            self._merge(conn, term_id, platform_id, target, averaged)
+            conn.execute('''
+                DELETE FROM series_blocks
+                WHERE term_id = ? AND platform_id = ? AND resolution = ? AND block_start = ?
+            ''', (term_id, platform_id, source, block_start))
+        return len(rows)
+
+    def compact(self, now=None):
+        """Aplica downsampling (hora → dia → semana) e a retenção das séries"""
+        now = time.time() if now is None else now
+        with self.db.transaction() as conn:
+            hourly = self._downsample(conn, 'hour', 'day', now - Config.SERIES_HOURLY_RETENTION_DAYS * DAY)
+            daily = self._downsample(conn, 'day', 'week', now - Config.SERIES_DAILY_RETENTION_DAYS * DAY)
+            expired = conn.execute('''
+                DELETE FROM series_blocks
+                WHERE resolution = 'week' AND block_start + ? <= ?
+            ''', (RESOLUTIONS['week']['block'], now - Config.SERIES_WEEKLY_RETENTION_DAYS * DAY)).rowcount
+        return {'hour': hourly, 'day': daily, 'expired': expired}
+
+
+def rebuild_blocks(conn, resolution):
+    """Reagrupa os pontos de uma resolução nos blocos atuais de RESOLUTIONS
+
+    Usado pelas migrações quando o tamanho ou o alinhamento dos blocos muda.
+    """
+    rows = conn.execute('''
+        SELECT term_id, platform_id, timestamps, "values" FROM series_blocks WHERE resolution = ?
+    ''', (resolution,)).fetchall()
+    series = {}
+    for term_id, platform_id, timestamps_blob, values_blob in rows:
+        series.setdefault((term_id, platform_id), {}).update(_unpack(timestamps_blob, values_blob))
+    conn.execute('DELETE FROM series_blocks WHERE resolution = ?', (resolution,))
+    for (term_id, platform_id), points in series.items():
+        blocks = {}
+        for timestamp, value in points.items():
+            blocks.setdefault(_block_start(timestamp, resolution), {})[timestamp] = value
+        for block_start, block_points in blocks.items():
+            timestamps, values = _pack(block_points)
+            conn.execute('''
+                INSERT INTO series_blocks
+                    (term_id, platform_id, resolution, block_start, timestamps, "values", point_count)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', (term_id, platform_id, resolution, block_start, timestamps, values, len(block_points)))
+    return len(series)
@@ -0,0 +1,59 @@
+"""Exporta o histórico de tendências direto do banco, sem subir a aplicação web
+
+Uso:
+    python export.py trends --format parquet --output tendencias.parquet
+    python export.py trends --start 2026-01-01 --end 2026-01-31 --platform Google > google.csv
+    python export.py user_searches --format ndjson --output pesquisas.ndjson
+"""
+
+import argparse
+import sys
+import time
+from app.models.export import FORMATS
+from app.models.trend_model import TrendModel
+from database.db_manager import EXPORT_COLUMNS
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Exportação em streaming das tendências')
+    parser.add_argument('table', choices=sorted(EXPORT_COLUMNS), help='tabela exportada')
+    parser.add_argument('--format', choices=sorted(FORMATS), default='csv', help='formato do arquivo')
+    parser.add_argument('--start', help='primeiro dia (AAAA-MM-DD)')
+    parser.add_argument('--end', help='último dia (AAAA-MM-DD)')
+    parser.add_argument('--platform', help='só esta plataforma (trends)')
+    parser.add_argument('--region', help='só este estado, ou Brasil para o volume nacional (trends)')
+    parser.add_argument('--batch-size', type=int, help='linhas por bloco (padrão: EXPORT_BATCH_SIZE)')
+    parser.add_argument('--output', help='arquivo de saída (padrão: saída padrão)')
+    args = parser.parse_args(argv)
+
+    # Mensagens da aplicação (migrações, consultas lentas) não podem cair no arquivo
+    stdout, sys.stdout = sys.stdout, sys.stderr
+    try:
+        try:
+            stream = TrendModel().export(
+                args.table, args.format, args.start, args.end,
+                args.platform, args.region, args.batch_size
+            )
+        except ValueError as e:
+            parser.error(str(e))
+
+        started = time.perf_counter()
+        written = 0
+        output = open(args.output, 'wb') if args.output else stdout.buffer
+        try:
+            for chunk in stream:
+                output.write(chunk)
+                written += len(chunk)
+        finally:
+            if args.output:
+                output.close()
+            else:
+                output.flush()
+    finally:
+        sys.stdout = stdout
+    print(f"Exportados {written / 1048576:.1f} MB em {time.perf_counter() - started:.1f} s", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,11 +1,13 @@
+from werkzeug.serving import is_running_from_reloader
 from app import create_app
-from database.db_manager import Database
 
-app = create_app()
+# app.run(debug=True) só liga o debug depois de create_app: aqui o reloader
+# reexecuta este arquivo em um processo filho e o coletor roda só nele
+app = create_app(start_collector=is_running_from_reloader() if __name__ == '__main__' else None)
 
 if __name__ == '__main__':
-    # Inicializar banco de dados
-    db = Database()
+    # O banco é aberto (e migrado) na primeira requisição ou coleta
+    print(f"Aplicação criada em {app.config['STARTUP_SECONDS'] * 1000:.0f} ms")
     
     # Executar aplicação
     app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
@@ -0,0 +1,10 @@
+from waitress import serve
+from app import create_app
+from config.config import Config
+
+app = create_app()
+
+if __name__ == '__main__':
+    # Servidor WSGI multithread para produção (run.py usa o servidor de desenvolvimento)
+    print(f"Servindo em http://{Config.SERVER_HOST}:{Config.SERVER_PORT} com {Config.SERVER_THREADS} threads")
+    serve(app, host=Config.SERVER_HOST, port=Config.SERVER_PORT, threads=Config.SERVER_THREADS)